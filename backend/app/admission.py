@@ -0,0 +1,217 @@
+"""Admission control for uploads.
+
+Requests that create new extraction work are turned away with ``503`` and
+``Retry-After`` while this process already has ``MAX_INFLIGHT_UPLOADS``
+uploads in progress or the extraction backlog is over its job or byte
+limit. Rejection happens before the body is read, so an overloaded
+process spends nothing on work it cannot finish, and work that was
+already admitted (including chunks of open upload sessions) keeps going.
+
+The backlog is the in-process background task count in ``background``
+mode and the shared ``extraction_jobs`` table in ``queue`` mode. When the
+queue depth cannot be read, uploads are refused and ``/health`` reports
+the depth as unknown.
+"""
+
+import json
+import logging
+import re
+import time
+from contextvars import ContextVar
+
+from prometheus_client import Counter
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models import Document, ExtractionJob
+
+logger = logging.getLogger(__name__)
+
+# How long a queue-depth reading from the database is reused.
+QUEUE_DEPTH_CHECK_SECONDS = 2.0
+
+ADMISSION_REJECTIONS = Counter(
+    "docproc_admission_rejections",
+    "Uploads rejected with 503 by admission control, by reason.",
+    ["reason"],
+)
+
+# Requests that start new extraction work.
+_ADMITTED_ROUTES = re.compile(r"^/(documents(/batch)?|uploads(/[^/]+/complete)?)$")
+
+_state = {
+    "inflight_uploads": 0,
+    "background_jobs": 0,
+    "background_bytes": 0,
+    "queue_checked_at": float("-inf"),
+    "queue_depth": (0, 0),
+}
+
+# Sizes of background extractions scheduled by the current request that have
+# not finished yet. Background tasks run inside the request's ASGI call, so
+# the middleware releases whatever is left once that call returns: tasks
+# skipped after an earlier one raised or the client went away.
+_unfinished: ContextVar[list[int] | None] = ContextVar("admission_unfinished", default=None)
+
+
+def extraction_scheduled(file_size: int) -> None:
+    if settings.EXTRACTION_MODE == "queue":
+        # Count our own enqueues until the next database reading, so a burst
+        # cannot overshoot the limits for a whole check interval.
+        jobs, size = _state["queue_depth"]
+        _state["queue_depth"] = (jobs + 1, size + (file_size or 0))
+        return
+    _state["background_jobs"] += 1
+    _state["background_bytes"] += file_size or 0
+    unfinished = _unfinished.get()
+    if unfinished is not None:
+        unfinished.append(file_size)
+
+
+def extraction_finished(file_size: int) -> None:
+    unfinished = _unfinished.get()
+    if unfinished is not None:
+        unfinished.remove(file_size)
+    _release_extraction(file_size)
+
+
+def _release_extraction(file_size: int) -> None:
+    _state["background_jobs"] -= 1
+    _state["background_bytes"] -= file_size or 0
+
+
+async def _queued_depth() -> tuple[int, int]:
+    from app.database import async_session
+
+    now = time.monotonic()
+    if now - _state["queue_checked_at"] < QUEUE_DEPTH_CHECK_SECONDS:
+        return _state["queue_depth"]
+    async with async_session() as db:
+        result = await db.execute(
+            select(func.count(), func.coalesce(func.sum(Document.file_size), 0))
+            .select_from(ExtractionJob)
+            .join(Document, Document.id == ExtractionJob.document_id)
+            .where(ExtractionJob.status.in_(("queued", "running")))
+        )
+        jobs, size = result.one()
+    _state["queue_depth"] = (int(jobs), int(size))
+    _state["queue_checked_at"] = now
+    return _state["queue_depth"]
+
+
+async def extraction_backlog() -> tuple[int, int]:
+    """Pending extraction jobs and their total bytes."""
+    if settings.EXTRACTION_MODE == "queue":
+        return await _queued_depth()
+    return _state["background_jobs"], _state["background_bytes"]
+
+
+async def _read_backlog() -> tuple[int, int] | None:
+    try:
+        return await extraction_backlog()
+    except Exception:
+        logger.warning("Extraction backlog unavailable; refusing uploads", exc_info=True)
+        return None
+
+
+def _reason(backlog: tuple[int, int] | None) -> str | None:
+    if settings.MAX_INFLIGHT_UPLOADS and _state["inflight_uploads"] >= settings.MAX_INFLIGHT_UPLOADS:
+        return "uploads"
+    if backlog is None:
+        return "unavailable"
+    jobs, size = backlog
+    if settings.MAX_PENDING_EXTRACTIONS and jobs >= settings.MAX_PENDING_EXTRACTIONS:
+        return "jobs"
+    if settings.MAX_PENDING_EXTRACTION_BYTES and size >= settings.MAX_PENDING_EXTRACTION_BYTES:
+        return "bytes"
+    return None
+
+
+async def rejection_reason() -> str | None:
+    if settings.MAX_INFLIGHT_UPLOADS and _state["inflight_uploads"] >= settings.MAX_INFLIGHT_UPLOADS:
+        return "uploads"
+    return _reason(await _read_backlog())
+
+
+async def queue_depth() -> dict:
+    """Backlog for ``/health``; the pending counts are ``None`` when unknown."""
+    backlog = await _read_backlog()
+    jobs, size = backlog if backlog is not None else (None, None)
+    return {
+        "mode": settings.EXTRACTION_MODE,
+        "inflight_uploads": _state["inflight_uploads"],
+        "pending_extractions": jobs,
+        "pending_extraction_bytes": size,
+        "accepting_uploads": _reason(backlog) is None,
+    }
+
+
+_REJECTION_DETAILS = {
+    "uploads": "Too many uploads in progress; retry later",
+    "jobs": "Extraction queue is full; retry later",
+    "bytes": "Extraction queue is full; retry later",
+    "unavailable": "Extraction queue state is unavailable; retry later",
+}
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware that bounds uploads before their bodies are read."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not _ADMITTED_ROUTES.match(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        reason = await rejection_reason()
+        if reason is not None:
+            ADMISSION_REJECTIONS.labels(reason).inc()
+            await _reject(send, _REJECTION_DETAILS[reason])
+            return
+
+        _state["inflight_uploads"] += 1
+        admitted = True
+        unfinished_token = _unfinished.set([])
+
+        def release():
+            nonlocal admitted
+            if admitted:
+                admitted = False
+                _state["inflight_uploads"] -= 1
+
+        async def send_wrapper(message):
+            await send(message)
+            # Background extraction runs after the response inside this call;
+            # it is tracked as backlog, so the upload slot ends with the response.
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                release()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            release()
+            for file_size in _unfinished.get():
+                _release_extraction(file_size)
+            _unfinished.reset(unfinished_token)
+
+
+async def _reject(send, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(settings.ADMISSION_RETRY_AFTER_SECONDS).encode("ascii")),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
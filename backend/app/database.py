@@ -1,41 +1,86 @@
+import logging
+import time
+
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy import text
 from sqlalchemy.orm import declarative_base
 
 from app.config import settings
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+logger = logging.getLogger(__name__)
+
+# How long a replica lag measurement is trusted before it is taken again.
+REPLICA_LAG_CHECK_SECONDS = 5.0
+
+engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=False,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+)
+
+if settings.DATABASE_READ_URL:
+    read_engine = create_async_engine(
+        settings.DATABASE_READ_URL,
+        echo=False,
+        pool_size=settings.DATABASE_READ_POOL_SIZE,
+        max_overflow=settings.DATABASE_READ_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
+else:
+    read_engine = engine
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+async_read_session = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
+_replica_state = {"checked_at": float("-inf"), "usable": True}
+
 
 async def get_db():
     async with async_session() as session:
         yield session
 
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
-        await conn.execute(
-            text(
-                "CREATE INDEX IF NOT EXISTS ix_documents_content_trgm "
-                "ON documents USING GIN (content gin_trgm_ops);"
-            )
-        )
-        await conn.execute(
-            text(
-                "ALTER TABLE processing_statuses "
-                "DROP CONSTRAINT IF EXISTS processing_statuses_document_id_fkey;"
-            )
-        )
-        await conn.execute(
+async def get_read_db():
+    """Session for read-only endpoints; uses the replica when one is configured and healthy."""
+    session_factory = async_read_session if await replica_usable() else async_session
+    async with session_factory() as session:
+        yield session
+
+
+async def replica_lag_seconds() -> float:
+    async with read_engine.connect() as conn:
+        lag = await conn.scalar(
             text(
-                "ALTER TABLE processing_statuses "
-                "ADD CONSTRAINT processing_statuses_document_id_fkey "
-                "FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE;"
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
             )
         )
+    return float(lag or 0)
+
+
+async def replica_usable() -> bool:
+    if read_engine is engine:
+        return False
+    if settings.DATABASE_READ_MAX_LAG_SECONDS <= 0:
+        return True
+
+    now = time.monotonic()
+    if now - _replica_state["checked_at"] < REPLICA_LAG_CHECK_SECONDS:
+        return _replica_state["usable"]
+    # Mark the check as done first so concurrent requests don't all probe the replica.
+    _replica_state["checked_at"] = now
+    try:
+        lag = await replica_lag_seconds()
+    except Exception:
+        logger.warning("Read replica unreachable; routing reads to the primary", exc_info=True)
+        usable = False
+    else:
+        usable = lag <= settings.DATABASE_READ_MAX_LAG_SECONDS
+        if not usable:
+            logger.warning("Read replica is %.1fs behind; routing reads to the primary", lag)
+    _replica_state["usable"] = usable
+    return usable
+
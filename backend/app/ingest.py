@@ -0,0 +1,264 @@
+"""Offline bulk ingestion.
+
+Usage:
+    python -m app.ingest SOURCE [--workers N] [--batch-size N] [--checkpoint FILE]
+
+SOURCE is a directory (walked recursively for ``*.pdf``) or a manifest
+file with one path per line. PDFs are parsed in worker processes and
+written to Postgres in batches with COPY, bypassing the HTTP API. Paths
+are appended to the checkpoint file once their batch commits, so an
+interrupted run resumes where it stopped.
+
+Extraction runs under the same per-document timeout and memory limit as
+the API and worker; a PDF that breaks either is recorded as failed and
+the run continues.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from datetime import datetime
+from typing import AsyncIterator, Iterator, NamedTuple
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import async_session, engine
+from app.services.cache import invalidate
+from app.services.extraction import ExtractionEngine, ExtractionFailed, is_memory_error
+from app.services.pdf_processor import extract_pages
+from app.services.search import build_search_vector_update
+from app.services.search_backend import sync_search_index
+from app.services.storage import ALLOWED_EXTENSIONS, sanitize_filename
+
+
+class IngestResult(NamedTuple):
+    path: str
+    file_size: int
+    content_hash: str
+    pages: list[str] | None
+    error: str | None
+
+
+def iter_source(source: str) -> Iterator[str]:
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in ALLOWED_EXTENSIONS:
+                    yield os.path.join(root, name)
+        return
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as manifest:
+        for line in manifest:
+            path = line.strip()
+            if path and not path.startswith("#"):
+                yield path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def load_checkpoint(path: str) -> set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as checkpoint:
+        return {line.rstrip("\n") for line in checkpoint if line.strip()}
+
+
+def _hash_file(path: str) -> tuple[int, str]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+
+def _failed(path: str, error: str) -> IngestResult:
+    try:
+        size, content_hash = _hash_file(path)
+    except OSError:
+        size, content_hash = 0, hashlib.sha256().hexdigest()
+    return IngestResult(path, size, content_hash, None, error)
+
+
+def ingest_file(path: str) -> IngestResult:
+    """Runs in a worker process: hash and extract one PDF."""
+    try:
+        size, content_hash = _hash_file(path)
+    except OSError as exc:
+        return _failed(path, str(exc) or "Unreadable file")
+    try:
+        pages = extract_pages(path)
+    except Exception as exc:
+        # Allocation failures go back to the engine, which recycles the worker.
+        if is_memory_error(exc):
+            raise
+        return IngestResult(path, size, content_hash, None, str(exc) or "Unreadable file")
+    return IngestResult(path, size, content_hash, pages, None)
+
+
+async def _ingest(engine: ExtractionEngine, path: str) -> IngestResult:
+    try:
+        return await engine.run(ingest_file, path)
+    except (TimeoutError, ExtractionFailed) as exc:
+        return await asyncio.to_thread(_failed, path, str(exc))
+
+
+async def extract_all(
+    engine: ExtractionEngine,
+    paths: list[str],
+    window: int,
+) -> AsyncIterator[IngestResult]:
+    """Yield results in completion order, keeping at most ``window`` files in flight."""
+    remaining = iter(paths)
+    pending: set[asyncio.Task] = set()
+
+    def submit() -> None:
+        path = next(remaining, None)
+        if path is not None:
+            pending.add(asyncio.create_task(_ingest(engine, path)))
+
+    for _ in range(window):
+        submit()
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            submit()
+            yield task.result()
+
+
+async def write_batch(batch: list[IngestResult]) -> int:
+    """Insert one batch with COPY in a single transaction; returns pages written."""
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        id_rows = await conn.execute(
+            text(
+                "SELECT nextval(pg_get_serial_sequence('documents', 'id')) "
+                "FROM generate_series(1, :count)"
+            ),
+            {"count": len(batch)},
+        )
+        document_ids = [row[0] for row in id_rows]
+
+        raw = await conn.get_raw_connection()
+        copy = raw.driver_connection
+        await copy.copy_records_to_table(
+            "documents",
+            columns=["id", "filename", "file_size", "page_count", "content_hash", "created_at"],
+            records=[
+                (
+                    document_id,
+                    sanitize_filename(result.path),
+                    result.file_size,
+                    len(result.pages) if result.pages is not None else None,
+                    result.content_hash,
+                    now,
+                )
+                for document_id, result in zip(document_ids, batch)
+            ],
+        )
+        await copy.copy_records_to_table(
+            "processing_statuses",
+            columns=["document_id", "status", "error_message", "processed_at"],
+            records=[
+                (
+                    document_id,
+                    "failed" if result.error else "completed",
+                    result.error,
+                    now,
+                )
+                for document_id, result in zip(document_ids, batch)
+            ],
+        )
+        page_records = [
+            (document_id, page_no, page_text)
+            for document_id, result in zip(document_ids, batch)
+            for page_no, page_text in enumerate(result.pages or [], start=1)
+        ]
+        if page_records:
+            await copy.copy_records_to_table(
+                "document_pages",
+                columns=["document_id", "page_no", "text"],
+                records=page_records,
+            )
+        await conn.execute(build_search_vector_update(), {"document_ids": document_ids})
+    async with async_session() as db:
+        await sync_search_index(db, document_ids)
+    await invalidate()
+    return len(page_records)
+
+
+async def run_ingest(source: str, workers: int, batch_size: int, checkpoint_path: str) -> None:
+    done = load_checkpoint(checkpoint_path)
+    paths = [path for path in iter_source(source) if path not in done]
+    print(f"{len(paths)} files to ingest ({len(done)} already done)")
+    if not paths:
+        return
+
+    extraction = ExtractionEngine(
+        max_workers=workers,
+        max_tasks_per_child=settings.EXTRACTION_MAX_TASKS_PER_CHILD,
+        timeout=settings.EXTRACTION_TIMEOUT_SECONDS,
+        memory_limit_mb=settings.EXTRACTION_MEMORY_LIMIT_MB,
+    )
+    started = time.monotonic()
+    documents = pages = 0
+    batch: list[IngestResult] = []
+
+    async def flush(checkpoint) -> None:
+        nonlocal batch, documents, pages
+        pages += await write_batch(batch)
+        documents += len(batch)
+        checkpoint.writelines(f"{item.path}\n" for item in batch)
+        checkpoint.flush()
+        batch = []
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        print(
+            f"{documents}/{len(paths)} docs, {pages} pages | "
+            f"{documents / elapsed:.1f} docs/s, {pages / elapsed:.1f} pages/s",
+            flush=True,
+        )
+
+    try:
+        with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+            # Twice the workers in flight keeps processes busy while a batch is written.
+            async for result in extract_all(extraction, paths, workers * 2):
+                batch.append(result)
+                if len(batch) >= batch_size:
+                    await flush(checkpoint)
+            if batch:
+                await flush(checkpoint)
+    finally:
+        extraction.shutdown()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-ingest PDFs directly into Postgres")
+    parser.add_argument("source", help="directory to walk or manifest file with one path per line")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.EXTRACTION_WORKERS,
+        help="extraction processes",
+    )
+    parser.add_argument("--batch-size", type=int, default=200, help="documents per COPY batch")
+    parser.add_argument(
+        "--checkpoint",
+        default="ingest.checkpoint",
+        help="file recording ingested paths, used to resume",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        sys.exit(f"Source not found: {args.source}")
+    asyncio.run(run_ingest(args.source, args.workers, args.batch_size, args.checkpoint))
+
+
+if __name__ == "__main__":
+    main()
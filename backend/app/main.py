@@ -1,21 +1,33 @@
+import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
+from app.admission import AdmissionMiddleware, queue_depth
 from app.config import settings
-from app.database import init_db
-from app.routes import documents, search
+from app.database import async_session, engine, read_engine
+from app.metrics import PrometheusMiddleware, instrument_engine, refresh_database_gauges
+from app.migrations import check_schema_version
+from app.routes import documents, search, uploads
+from app.services.extraction import extraction_engine
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db()
+    await check_schema_version(engine)
     yield
+    extraction_engine.shutdown()
 
 
 app = FastAPI(title="DocProc API", version="0.1.0", lifespan=lifespan)
+instrument_engine(engine)
+instrument_engine(read_engine)
 
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -23,11 +35,24 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(PrometheusMiddleware)
 
 app.include_router(documents.router, tags=["documents"])
 app.include_router(search.router, tags=["search"])
+app.include_router(uploads.router, tags=["uploads"])
 
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "queue": await queue_depth()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Process metrics matter most while the database is failing; keep serving them.
+    try:
+        async with async_session() as db:
+            await refresh_database_gauges(db)
+    except Exception:
+        logger.warning("Skipping database gauges in /metrics", exc_info=True)
+    return Response(generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
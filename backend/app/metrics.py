@@ -0,0 +1,149 @@
+"""Prometheus instrumentation.
+
+Metrics live in the default registry of each process: the API exposes
+them on ``/metrics`` and ``app.worker --metrics-port`` serves its own.
+"""
+
+import time
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from starlette.routing import Match
+
+from app.models import ExtractionJob, ProcessingStatus
+from app.services.extraction import extraction_engine
+
+DOCUMENT_STATUSES = ("processing", "completed", "failed")
+# Status counts scan processing_statuses, so scrapes reuse them for a few seconds.
+DATABASE_GAUGE_TTL_SECONDS = 10.0
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "docproc_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+EXTRACTION_SECONDS = Histogram(
+    "docproc_extraction_duration_seconds",
+    "Wall-clock time spent extracting text from one PDF.",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+EXTRACTION_PAGES_PER_SECOND = Histogram(
+    "docproc_extraction_pages_per_second",
+    "Extraction throughput of successfully parsed PDFs.",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+DB_STATEMENT_SECONDS = Histogram(
+    "docproc_db_statement_duration_seconds",
+    "SQL statement execution time by leading keyword.",
+    ["operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10),
+)
+DOCUMENTS_BY_STATUS = Gauge(
+    "docproc_documents",
+    "Documents by processing status.",
+    ["status"],
+)
+EXTRACTION_JOBS_QUEUED = Gauge(
+    "docproc_extraction_jobs_queued",
+    "Extraction jobs waiting in the durable queue.",
+)
+EXTRACTION_PENDING = Gauge(
+    "docproc_extraction_pending",
+    "Extractions submitted to this process's pool and not yet finished.",
+)
+EXTRACTION_PENDING.set_function(lambda: extraction_engine.pending)
+
+_database_gauges_refreshed = 0.0
+_seen_statuses = set(DOCUMENT_STATUSES)
+
+
+def observe_extraction(outcome: str, seconds: float, pages: int = 0) -> None:
+    EXTRACTION_SECONDS.labels(outcome).observe(seconds)
+    if pages and seconds > 0:
+        EXTRACTION_PAGES_PER_SECOND.observe(pages / seconds)
+
+
+def _operation(statement: str) -> str:
+    words = statement.split(None, 1)
+    keyword = words[0].upper() if words else ""
+    return keyword if keyword in _SQL_OPERATIONS else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is not None:
+        DB_STATEMENT_SECONDS.labels(_operation(statement)).observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+async def refresh_database_gauges(db: AsyncSession) -> None:
+    global _database_gauges_refreshed
+
+    now = time.monotonic()
+    if now - _database_gauges_refreshed < DATABASE_GAUGE_TTL_SECONDS:
+        return
+    result = await db.execute(
+        select(ProcessingStatus.status, func.count()).group_by(ProcessingStatus.status)
+    )
+    counts = dict(result.all())
+    # Statuses that disappeared since the last scrape drop to zero rather than going stale.
+    _seen_statuses.update(counts)
+    for status in _seen_statuses:
+        DOCUMENTS_BY_STATUS.labels(status).set(counts.get(status, 0))
+
+    queued = await db.scalar(
+        select(func.count()).select_from(ExtractionJob).where(ExtractionJob.status == "queued")
+    )
+    EXTRACTION_JOBS_QUEUED.set(queued or 0)
+    _database_gauges_refreshed = now
+
+
+class PrometheusMiddleware:
+    """Pure ASGI middleware recording request latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = _route_template(scope)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status_code)).observe(
+                time.perf_counter() - started
+            )
+
+
+def _route_template(scope) -> str:
+    # Label by template rather than raw path so ids do not explode cardinality.
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
@@ -0,0 +1,40 @@
+"""Apply database schema migrations.
+
+Usage:
+    python -m app.migrate [--status]
+
+Run once per deploy, before starting API or worker processes; they refuse
+to start against a database that is behind ``app.migrations.LATEST_VERSION``.
+"""
+
+import argparse
+import asyncio
+
+from app.database import engine
+from app.migrations import LATEST_VERSION, migrate, schema_version
+
+
+async def run_migrate(status_only: bool) -> None:
+    try:
+        if status_only:
+            async with engine.connect() as conn:
+                version = await schema_version(conn)
+            print(f"Schema version {version} (latest {LATEST_VERSION})")
+            return
+        applied = await migrate(engine)
+        for migration in applied:
+            print(f"Applied {migration.version}: {migration.description}")
+        print(f"Schema is at version {LATEST_VERSION}" if applied else "Schema is up to date")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply DocProc database migrations")
+    parser.add_argument("--status", action="store_true", help="only print the current schema version")
+    args = parser.parse_args()
+    asyncio.run(run_migrate(args.status))
+
+
+if __name__ == "__main__":
+    main()
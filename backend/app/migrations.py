@@ -0,0 +1,334 @@
+"""Versioned schema migrations.
+
+Migrations run out of band with ``python -m app.migrate``; API and worker
+processes only compare ``schema_migrations`` with ``LATEST_VERSION`` at
+startup. Each migration runs in its own transaction and is recorded in the
+same transaction, and a Postgres advisory lock keeps concurrent runners
+from applying the same migration twice.
+
+Migration 1 creates missing tables from the current models, so later
+migrations must tolerate objects that already exist (``IF NOT EXISTS``).
+Migrations marked ``transactional=False`` run on an autocommit connection
+so they can use ``CREATE INDEX CONCURRENTLY`` or release locks between
+steps; they must be safe to re-run.
+"""
+
+from typing import Awaitable, Callable, NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+# Arbitrary key for pg_advisory_lock, shared by every migration runner.
+MIGRATION_LOCK_ID = 7_305_220_001
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[AsyncConnection], Awaitable[None]]
+    transactional: bool = True
+
+
+async def _initial_schema(conn: AsyncConnection) -> None:
+    import app.models  # noqa: F401 - registers tables on Base.metadata
+    from app.database import Base
+
+    await conn.run_sync(Base.metadata.create_all)
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+    await conn.execute(
+        text("ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_vector tsvector;")
+    )
+    await conn.execute(
+        text("ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);")
+    )
+    await conn.execute(
+        text(
+            "ALTER TABLE documents "
+            "ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1, "
+            "ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITHOUT TIME ZONE;"
+        )
+    )
+    await conn.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_documents_content_hash ON documents (content_hash);")
+    )
+    await conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_documents_search_vector "
+            "ON documents USING GIN (search_vector);"
+        )
+    )
+    await conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_document_pages_text_fts "
+            "ON document_pages USING GIN (to_tsvector('english', text));"
+        )
+    )
+    await conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_document_pages_text_trgm "
+            "ON document_pages USING GIN (text gin_trgm_ops);"
+        )
+    )
+
+
+async def _processing_status_cascade(conn: AsyncConnection) -> None:
+    """Give databases created before ``ON DELETE CASCADE`` the cascading foreign key.
+
+    Runs in autocommit mode: swapping the constraint takes an ACCESS
+    EXCLUSIVE lock that is released as soon as that statement commits, and
+    the separate VALIDATE scans existing rows under SHARE UPDATE EXCLUSIVE,
+    which does not block reads or writes.
+    """
+    row = (
+        await conn.execute(
+            text(
+                "SELECT confdeltype::text, convalidated FROM pg_constraint "
+                "WHERE conname = 'processing_statuses_document_id_fkey';"
+            )
+        )
+    ).first()
+    if row is not None and row[0] == "c" and row[1]:
+        return
+    if row is None or row[0] != "c":
+        # One statement, so there is never a moment without the foreign key.
+        await conn.execute(
+            text(
+                "ALTER TABLE processing_statuses "
+                "DROP CONSTRAINT IF EXISTS processing_statuses_document_id_fkey, "
+                "ADD CONSTRAINT processing_statuses_document_id_fkey "
+                "FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE NOT VALID;"
+            )
+        )
+    # A run interrupted after the swap resumes here.
+    await conn.execute(
+        text(
+            "ALTER TABLE processing_statuses "
+            "VALIDATE CONSTRAINT processing_statuses_document_id_fkey;"
+        )
+    )
+
+
+async def _tag_document_counts(conn: AsyncConnection) -> None:
+    has_tag_counts = await conn.scalar(
+        text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'tags' AND column_name = 'document_count';"
+        )
+    )
+    if not has_tag_counts:
+        await conn.execute(
+            text("ALTER TABLE tags ADD COLUMN document_count INTEGER NOT NULL DEFAULT 0;")
+        )
+    await conn.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_tags_name_pattern ON tags (name text_pattern_ops);")
+    )
+    await conn.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_tags_document_count ON tags (document_count);")
+    )
+    for operation, table, sign in (("insert", "NEW", "+"), ("delete", "OLD", "-")):
+        # Statement-level triggers apply one grouped update per tag, however
+        # many links a bulk statement touched.
+        await conn.execute(
+            text(
+                f"CREATE OR REPLACE FUNCTION document_tags_count_{operation}() "
+                "RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+                f"UPDATE tags SET document_count = tags.document_count {sign} changed.links "
+                "FROM (SELECT tag_id, count(*) AS links FROM changed_links GROUP BY tag_id) "
+                "AS changed WHERE tags.id = changed.tag_id; "
+                "RETURN NULL; END $$;"
+            )
+        )
+        await conn.execute(
+            text(
+                f"CREATE OR REPLACE TRIGGER document_tags_count_{operation} "
+                f"AFTER {operation.upper()} ON document_tags "
+                f"REFERENCING {table} TABLE AS changed_links "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION document_tags_count_{operation}();"
+            )
+        )
+    # Recount in the same transaction that installs the triggers, so no link
+    # change can slip between the two.
+    await conn.execute(
+        text(
+            "UPDATE tags SET document_count = coalesce(counts.links, 0) FROM tags AS t "
+            "LEFT JOIN (SELECT tag_id, count(*) AS links FROM document_tags GROUP BY tag_id) "
+            "AS counts ON counts.tag_id = t.id "
+            "WHERE tags.id = t.id AND tags.document_count <> coalesce(counts.links, 0);"
+        )
+    )
+
+
+async def _has_content_column(conn: AsyncConnection) -> bool:
+    return bool(
+        await conn.scalar(
+            text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'documents' AND column_name = 'content';"
+            )
+        )
+    )
+
+
+async def _backfill_pages_from_content(conn: AsyncConnection) -> None:
+    """Documents extracted before page storage existed become a single page."""
+    if not await _has_content_column(conn):
+        return
+    await conn.execute(
+        text(
+            "INSERT INTO document_pages (document_id, page_no, text) "
+            "SELECT documents.id, 1, documents.content FROM documents "
+            "WHERE documents.content IS NOT NULL AND NOT EXISTS ("
+            "SELECT 1 FROM document_pages WHERE document_pages.document_id = documents.id"
+            ");"
+        )
+    )
+
+
+async def _backfill_pages_and_search(conn: AsyncConnection) -> None:
+    from app.services.search import build_search_vector_update
+
+    await _backfill_pages_from_content(conn)
+    missing = await conn.execute(text("SELECT id FROM documents WHERE search_vector IS NULL;"))
+    await conn.execute(
+        build_search_vector_update(), {"document_ids": [row[0] for row in missing]}
+    )
+
+
+async def _create_index_concurrently(conn: AsyncConnection, name: str, definition: str) -> None:
+    """Build an index without blocking writes, replacing one left invalid by a failed build."""
+    valid = await conn.scalar(
+        text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name);"),
+        {"name": name},
+    )
+    if valid:
+        return
+    if valid is not None:
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name};"))
+    await conn.execute(text(f"CREATE INDEX CONCURRENTLY {name} ON {definition};"))
+
+
+async def _fuzzy_search_indexes(conn: AsyncConnection) -> None:
+    await _create_index_concurrently(
+        conn, "ix_documents_filename_trgm", "documents USING GIN (filename gin_trgm_ops)"
+    )
+    await _create_index_concurrently(
+        conn, "ix_tags_name_trgm", "tags USING GIN (name gin_trgm_ops)"
+    )
+
+
+async def _drop_document_content(conn: AsyncConnection) -> None:
+    """Page rows are the only copy of extracted text; drop the duplicate ``content`` blob.
+
+    Dropping a column only updates the catalog; the old values are reclaimed
+    as rows are rewritten (or by ``VACUUM FULL documents``).
+    """
+    await _backfill_pages_from_content(conn)
+    # Also drops ix_documents_content_trgm.
+    await conn.execute(text("ALTER TABLE documents DROP COLUMN IF EXISTS content;"))
+
+
+async def _cache_generation(conn: AsyncConnection) -> None:
+    """Single-row generation shared by every process's response cache."""
+    await conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS cache_generation ("
+            "id SMALLINT PRIMARY KEY CHECK (id = 1), "
+            "generation BIGINT NOT NULL DEFAULT 0, "
+            "bumped_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now());"
+        )
+    )
+    await conn.execute(
+        text("INSERT INTO cache_generation (id) VALUES (1) ON CONFLICT (id) DO NOTHING;")
+    )
+
+
+async def _metadata_search_vectors(conn: AsyncConnection) -> None:
+    """Rebuild search vectors from filename and tags only; pages are matched directly."""
+    from app.services.search import build_search_vector_update
+
+    documents = await conn.execute(text("SELECT id FROM documents;"))
+    await conn.execute(
+        build_search_vector_update(), {"document_ids": [row[0] for row in documents]}
+    )
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "initial schema", _initial_schema),
+    Migration(
+        2,
+        "cascade processing_statuses deletes",
+        _processing_status_cascade,
+        transactional=False,
+    ),
+    Migration(3, "tag document counts", _tag_document_counts),
+    Migration(4, "backfill pages and search vectors", _backfill_pages_and_search),
+    Migration(5, "trigram indexes for fuzzy search", _fuzzy_search_indexes, transactional=False),
+    Migration(6, "drop documents.content in favour of document_pages", _drop_document_content),
+    Migration(7, "shared cache generation", _cache_generation),
+    Migration(8, "search vectors without page text", _metadata_search_vectors),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def schema_version(conn: AsyncConnection) -> int:
+    if await conn.scalar(text("SELECT to_regclass('schema_migrations');")) is None:
+        return 0
+    return await conn.scalar(text("SELECT coalesce(max(version), 0) FROM schema_migrations;"))
+
+
+async def migrate(engine: AsyncEngine) -> list[Migration]:
+    """Apply pending migrations in order and return the ones applied."""
+    applied = []
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT pg_advisory_lock(:key);"), {"key": MIGRATION_LOCK_ID})
+        await conn.commit()
+        try:
+            async with conn.begin():
+                await conn.execute(
+                    text(
+                        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                        "version INTEGER PRIMARY KEY, "
+                        "description TEXT NOT NULL, "
+                        "applied_at TIMESTAMP WITHOUT TIME ZONE NOT NULL "
+                        "DEFAULT (now() AT TIME ZONE 'utc'));"
+                    )
+                )
+                current = await schema_version(conn)
+            for migration in MIGRATIONS:
+                if migration.version <= current:
+                    continue
+                if not migration.transactional:
+                    # Each statement commits on its own: CREATE INDEX CONCURRENTLY
+                    # cannot run in a transaction block, and long steps must not
+                    # keep the locks of earlier ones.
+                    async with engine.connect() as ddl_conn:
+                        ddl_conn = await ddl_conn.execution_options(isolation_level="AUTOCOMMIT")
+                        await migration.apply(ddl_conn)
+                async with conn.begin():
+                    if migration.transactional:
+                        await migration.apply(conn)
+                    await conn.execute(
+                        text(
+                            "INSERT INTO schema_migrations (version, description) "
+                            "VALUES (:version, :description);"
+                        ),
+                        {"version": migration.version, "description": migration.description},
+                    )
+                applied.append(migration)
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key);"), {"key": MIGRATION_LOCK_ID})
+            await conn.commit()
+    return applied
+
+
+async def check_schema_version(engine: AsyncEngine) -> int:
+    """Fail fast when the database has not been migrated to this code's schema."""
+    async with engine.connect() as conn:
+        version = await schema_version(conn)
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version}, expected {LATEST_VERSION}; "
+            "run `python -m app.migrate`"
+        )
+    return version
@@ -1,5 +1,6 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 
 from app.database import Base
@@ -19,14 +20,18 @@ class Document(Base):
     __tablename__ = "documents"
     __table_args__ = (
         Index("ix_documents_created_at", "created_at"),
+        Index("ix_documents_content_hash", "content_hash"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)
-    content = Column(Text)
     file_size = Column(Integer)
     page_count = Column(Integer)
+    content_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     processing_status = relationship(
         "ProcessingStatus",
@@ -43,6 +48,14 @@ class Document(Base):
     )
 
 
+class DocumentPage(Base):
+    __tablename__ = "document_pages"
+
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+    page_no = Column(Integer, primary_key=True)
+    text = Column(Text, nullable=False, default="")
+
+
 class ProcessingStatus(Base):
     __tablename__ = "processing_statuses"
     __table_args__ = (
@@ -64,14 +77,39 @@ class Tag(Base):
     __table_args__ = (
         UniqueConstraint("name", name="uq_tags_name"),
         Index("ix_tags_name", "name"),
+        Index("ix_tags_name_pattern", "name", postgresql_ops={"name": "text_pattern_ops"}),
+        Index("ix_tags_document_count", "document_count"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Maintained by triggers on document_tags (see app.migrations).
+    document_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     documents = relationship(
         "Document",
         secondary=document_tags,
         back_populates="tags",
     )
+
+
+class ExtractionJob(Base):
+    __tablename__ = "extraction_jobs"
+    __table_args__ = (
+        Index("ix_extraction_jobs_status_run_after", "status", "run_after"),
+        Index("ix_extraction_jobs_document_id", "document_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    file_path = Column(String(1024), nullable=False)
+    status = Column(String(50), default="queued", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = Column(String(255), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,89 @@
+"""Retention purge.
+
+Usage:
+    python -m app.purge [--older-than-days N] [--tag NAME] [--batch-size N] [--pause SECONDS] [--dry-run]
+
+Deletes documents created more than N days ago (``RETENTION_DAYS`` by
+default) in batches of ``--batch-size``, committing after each batch so
+no transaction holds row locks for long. Intended to run from cron or a
+scheduled job; an interrupted run simply continues on the next one.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.database import async_session
+from app.services.retention import build_bulk_delete, build_deletion_filter, delete_documents
+
+
+async def run_purge(
+    created_before: datetime,
+    tag: str | None = None,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+) -> int:
+    total = 0
+    while True:
+        started = time.monotonic()
+        async with async_session() as db:
+            deleted = await delete_documents(
+                db,
+                build_bulk_delete(
+                    tag=tag,
+                    created_before=created_before,
+                    limit=batch_size,
+                    skip_locked=True,
+                ),
+            )
+        total += len(deleted)
+        if deleted:
+            print(f"Deleted {len(deleted)} documents in {time.monotonic() - started:.2f}s ({total} total)")
+        if len(deleted) < batch_size:
+            return total
+        if pause:
+            await asyncio.sleep(pause)
+
+
+async def count_expired(created_before: datetime, tag: str | None = None) -> int:
+    doomed = build_deletion_filter(tag=tag, created_before=created_before).subquery()
+    async with async_session() as db:
+        result = await db.execute(select(func.count()).select_from(doomed))
+        return result.scalar_one()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete documents past their retention period")
+    parser.add_argument(
+        "--older-than-days",
+        type=int,
+        default=settings.RETENTION_DAYS,
+        help="delete documents created more than this many days ago (default: RETENTION_DAYS)",
+    )
+    parser.add_argument("--tag", help="only purge documents carrying this tag")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents deleted per transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--dry-run", action="store_true", help="only report how many documents match")
+    args = parser.parse_args()
+
+    if args.older_than_days <= 0:
+        sys.exit("Retention is disabled; pass --older-than-days or set RETENTION_DAYS")
+    if args.batch_size <= 0:
+        sys.exit("--batch-size must be positive")
+
+    created_before = datetime.utcnow() - timedelta(days=args.older_than_days)
+    if args.dry_run:
+        count = asyncio.run(count_expired(created_before, args.tag))
+        print(f"{count} documents created before {created_before.isoformat()} would be deleted")
+        return
+    total = asyncio.run(run_purge(created_before, args.tag, args.batch_size, args.pause))
+    print(f"Purged {total} documents created before {created_before.isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
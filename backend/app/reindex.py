@@ -0,0 +1,89 @@
+"""Rebuild the inverted search index from Postgres.
+
+Usage:
+    python -m app.reindex [--batch-size N]
+
+Only needed with ``SEARCH_BACKEND=inverted``: after first enabling it,
+after restoring a database, or when index updates were lost. Every
+document is re-indexed and entries for documents no longer in Postgres
+are dropped; the index keeps serving searches while this runs.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import async_session, engine
+from app.models import Document
+from app.services.search_backend import InvertedIndexBackend, get_search_backend
+
+
+async def run_reindex(backend: InvertedIndexBackend, batch_size: int) -> int:
+    started = time.monotonic()
+    indexed: set[int] = set()
+    after_id = 0
+    try:
+        while True:
+            async with async_session() as db:
+                result = await db.execute(
+                    select(Document.id)
+                    .where(Document.id > after_id)
+                    .order_by(Document.id)
+                    .limit(batch_size)
+                )
+                document_ids = result.scalars().all()
+                if not document_ids:
+                    break
+                await backend.index_documents(db, document_ids)
+            indexed.update(document_ids)
+            after_id = document_ids[-1]
+            print(f"Indexed {len(indexed)} documents ({time.monotonic() - started:.1f}s)", flush=True)
+
+        # Documents uploaded during the scan are indexed by their write path
+        # and may be missing from ``indexed``; only ids the scan passed are
+        # candidates, and each is re-checked before it is dropped.
+        candidates = await asyncio.to_thread(backend.index.document_ids)
+        candidates = sorted(
+            document_id
+            for document_id in candidates - indexed
+            if document_id <= after_id
+        )
+        stale = await _missing_documents(candidates, batch_size)
+        if stale:
+            await backend.remove_documents(stale)
+            print(f"Removed {len(stale)} documents no longer in the database")
+    finally:
+        await engine.dispose()
+    return len(indexed)
+
+
+async def _missing_documents(document_ids: list[int], batch_size: int) -> list[int]:
+    missing = []
+    async with async_session() as db:
+        for start in range(0, len(document_ids), batch_size):
+            batch = document_ids[start : start + batch_size]
+            result = await db.execute(select(Document.id).where(Document.id.in_(batch)))
+            missing.extend(sorted(set(batch) - set(result.scalars().all())))
+    return missing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the DocProc inverted search index")
+    parser.add_argument("--batch-size", type=int, default=500, help="documents read per query")
+    args = parser.parse_args()
+
+    backend = get_search_backend()
+    if not isinstance(backend, InvertedIndexBackend):
+        sys.exit("SEARCH_BACKEND is not 'inverted'; there is no index to rebuild")
+    if args.batch_size <= 0:
+        sys.exit("--batch-size must be positive")
+    total = asyncio.run(run_reindex(backend, args.batch_size))
+    print(f"Indexed {total} documents into {settings.SEARCH_INDEX_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+from fastapi import Response
+from pydantic import BaseModel
+
+
+def json_response(model: BaseModel, status_code: int = 200, headers: dict | None = None) -> Response:
+    """Serialize with pydantic-core directly, skipping FastAPI's jsonable_encoder pass."""
+    return Response(
+        content=model.model_dump_json(),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
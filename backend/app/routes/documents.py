@@ -1,15 +1,52 @@
-from fastapi import APIRouter, Depends, UploadFile, HTTPException, BackgroundTasks
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, UploadFile, HTTPException, BackgroundTasks, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models import Document, Tag, ProcessingStatus
-from app.schemas import DocumentResponse, DocumentDetail, TagResponse, TagCreate, TagSummary
-from app.services.documents import create_document
+from app.config import settings
+from app.database import async_session, get_db, get_read_db
+from app.responses import json_response
+from app.models import Document, DocumentPage, Tag, ProcessingStatus
+from app.schemas import (
+    BatchUploadResponse,
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    BulkTagRequest,
+    DocumentDetail,
+    DocumentListPage,
+    DocumentPageResponse,
+    TagCountResponse,
+    TagResponse,
+    TagCreate,
+    TagSummary,
+)
+from app.services.cache import cached, invalidate
+from app.services.content import iter_content, load_content, load_page_sizes, parse_range
+from app.services.documents import (
+    build_document_list_query,
+    create_document,
+    create_documents_batch,
+    decode_document_cursor,
+    encode_document_cursor,
+)
+from app.services.retention import build_bulk_delete, delete_documents
+from app.services.search import refresh_search_vectors
+from app.services.search_backend import sync_search_metadata
+from app.services.tags import apply_bulk_tags, build_tag_list_query
+from app.services.versions import document_etag, etag_matches, list_etag, touch_documents
 
 router = APIRouter()
 
+MAX_PAGES_PER_REQUEST = 100
+MAX_DOCUMENTS_PER_PAGE = 200
+MAX_BULK_TAG_DOCUMENTS = 50_000
+MAX_BULK_DELETE_DOCUMENTS = 50_000
+MAX_TAGS_PER_PAGE = 1000
+
 
 @router.post("/documents")
 async def upload_document(
@@ -21,37 +58,79 @@ async def upload_document(
     return {"id": document.id, "filename": document.filename}
 
 
+@router.post("/documents/batch")
+async def upload_documents_batch(
+    files: list[UploadFile],
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
+    if len(files) > settings.MAX_BATCH_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.MAX_BATCH_FILES} files can be uploaded at once",
+        )
+    items = await create_documents_batch(files, db, background_tasks)
+    return BatchUploadResponse(items=items)
+
+
 @router.get("/documents")
-async def list_documents(tag: str | None = None, db: AsyncSession = Depends(get_db)):
-    query = select(Document).options(
-        selectinload(Document.processing_status),
-        selectinload(Document.tags),
+async def list_documents(
+    tag: list[str] | None = Query(None),
+    tag_mode: Literal["all", "any"] = "all",
+    status: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    limit: int = Query(50, ge=1, le=MAX_DOCUMENTS_PER_PAGE),
+    cursor: str | None = None,
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    query = build_document_list_query(
+        limit + 1,
+        after=decode_document_cursor(cursor) if cursor else None,
+        tags=tag,
+        tag_mode=tag_mode,
+        status=status,
+        created_after=created_after,
+        created_before=created_before,
     )
-    if tag:
-        query = query.join(Document.tags).where(Tag.name == tag.lower())
     result = await db.execute(query)
-    documents = result.scalars().all()
-
-    response = []
-    for doc in documents:
-        status = doc.processing_status
-        response.append(
-            DocumentResponse(
-                id=doc.id,
-                filename=doc.filename,
-                file_size=doc.file_size,
-                page_count=doc.page_count,
-                status=status.status if status else "unknown",
-                created_at=doc.created_at,
-                tags=[TagSummary(id=tag.id, name=tag.name) for tag in doc.tags],
-            )
-        )
+    rows = result.all()
 
-    return response
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_document_cursor(rows[-1])
+
+    headers = {
+        "ETag": list_etag([(row.id, row.version) for row in rows], next_cursor),
+        "Cache-Control": "no-cache",
+    }
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    page = DocumentListPage.model_validate(
+        {"items": [dict(row._mapping) for row in rows], "next_cursor": next_cursor}
+    )
+    return json_response(page, headers=headers)
 
 
 @router.get("/documents/{document_id}")
-async def get_document(document_id: int, db: AsyncSession = Depends(get_db)):
+async def get_document(
+    document_id: int,
+    include_content: bool = False,
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    if if_none_match:
+        # Answer revalidations from the version column alone, before content is read.
+        version = await db.scalar(select(Document.version).where(Document.id == document_id))
+        if version is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        etag = document_etag(document_id, version, include_content)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
     result = await db.execute(
         select(Document)
         .where(Document.id == document_id)
@@ -65,22 +144,123 @@ async def get_document(document_id: int, db: AsyncSession = Depends(get_db)):
     await db.refresh(document, attribute_names=["processing_status"])
     status = document.processing_status
 
-    return DocumentDetail(
+    detail = DocumentDetail(
         id=document.id,
         filename=document.filename,
-        content=document.content,
+        # Large documents should be read through /content, which streams page by page.
+        content=await load_content(db, document_id) if include_content else None,
         file_size=document.file_size,
         page_count=document.page_count,
         status=status.status if status else "unknown",
         created_at=document.created_at,
         tags=[TagSummary(id=tag.id, name=tag.name) for tag in document.tags],
     )
+    return json_response(
+        detail,
+        headers={
+            "ETag": document_etag(document.id, document.version, include_content),
+            "Cache-Control": "no-cache",
+        },
+    )
+
+
+@router.get("/documents/{document_id}/content")
+async def get_document_content(
+    document_id: int,
+    request: Request,
+    offset: int = Query(0, ge=0),
+    length: int | None = Query(None, ge=1),
+    db: AsyncSession = Depends(get_db),
+):
+    exists = await db.scalar(select(Document.id).where(Document.id == document_id))
+    if exists is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    page_sizes = await load_page_sizes(db, document_id)
+    total = sum(size for _, size in page_sizes)
+    headers = {"Accept-Ranges": "bytes"}
+    status_code = 200
+
+    range_header = request.headers.get("range")
+    byte_range = parse_range(range_header, total) if range_header else None
+    if byte_range:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{total}"
+    else:
+        start = min(offset, total)
+        end = total - 1 if length is None else min(offset + length, total) - 1
+    headers["Content-Length"] = str(max(end - start + 1, 0))
+
+    return StreamingResponse(
+        iter_content(async_session, document_id, page_sizes, start, end),
+        status_code=status_code,
+        media_type="text/plain",
+        headers=headers,
+    )
+
+
+@router.get("/documents/{document_id}/pages")
+async def get_document_pages(
+    document_id: int,
+    from_page: int = Query(1, alias="from", ge=1),
+    to_page: int | None = Query(None, alias="to", ge=1),
+    db: AsyncSession = Depends(get_db),
+):
+    if to_page is None:
+        to_page = from_page + MAX_PAGES_PER_REQUEST - 1
+    if to_page < from_page:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if to_page - from_page + 1 > MAX_PAGES_PER_REQUEST:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_PAGES_PER_REQUEST} pages can be requested at once",
+        )
+
+    exists = await db.scalar(select(Document.id).where(Document.id == document_id))
+    if exists is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    result = await db.execute(
+        select(DocumentPage)
+        .where(
+            DocumentPage.document_id == document_id,
+            DocumentPage.page_no.between(from_page, to_page),
+        )
+        .order_by(DocumentPage.page_no)
+    )
+    return [DocumentPageResponse.model_validate(page) for page in result.scalars().all()]
 
 
 @router.get("/tags")
-async def list_tags(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Tag))
-    return [TagResponse.model_validate(tag) for tag in result.scalars().all()]
+async def list_tags(
+    with_counts: bool = False,
+    prefix: str | None = None,
+    order: Literal["name", "count"] = "name",
+    limit: int | None = Query(None, ge=1, le=MAX_TAGS_PER_PAGE),
+    db: AsyncSession = Depends(get_read_db),
+):
+    schema = TagCountResponse if with_counts else TagResponse
+
+    async def load():
+        result = await db.execute(build_tag_list_query(prefix, limit, order))
+        return [schema.model_validate(tag) for tag in result.scalars().all()]
+
+    return await cached("tags", [with_counts, prefix, order, limit], load)
+
+
+@router.post("/tags/bulk")
+async def bulk_tag_documents(payload: BulkTagRequest, db: AsyncSession = Depends(get_db)):
+    if not payload.document_ids:
+        raise HTTPException(status_code=400, detail="document_ids is required")
+    if len(payload.document_ids) > MAX_BULK_TAG_DOCUMENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BULK_TAG_DOCUMENTS} documents can be tagged at once",
+        )
+    if not payload.add and not payload.remove:
+        raise HTTPException(status_code=400, detail="Nothing to add or remove")
+    return await apply_bulk_tags(db, payload.document_ids, payload.add, payload.remove)
 
 
 @router.post("/documents/{document_id}/tags")
@@ -100,11 +280,17 @@ async def add_tag(document_id: int, payload: TagCreate, db: AsyncSession = Depen
         db.add(tag)
         await db.commit()
         await db.refresh(tag)
+        await invalidate()
 
     await db.refresh(document, attribute_names=["tags"])
     if tag not in document.tags:
         document.tags.append(tag)
+        await db.flush()
+        await refresh_search_vectors(db, [document_id])
+        await touch_documents(db, [document_id])
         await db.commit()
+        await sync_search_metadata(db, [document_id])
+        await invalidate()
 
     return TagResponse.model_validate(tag)
 
@@ -122,26 +308,41 @@ async def remove_tag(document_id: int, tag_id: int, db: AsyncSession = Depends(g
     await db.refresh(document, attribute_names=["tags"])
     if tag in document.tags:
         document.tags.remove(tag)
+        await db.flush()
+        await refresh_search_vectors(db, [document_id])
+        await touch_documents(db, [document_id])
         await db.commit()
+        await sync_search_metadata(db, [document_id])
+        await invalidate()
 
     return {"message": "Tag removed"}
 
 
-@router.delete("/documents/{document_id}")
-async def delete_document(document_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Document)
-        .where(Document.id == document_id)
-        .options(selectinload(Document.processing_status))
+@router.delete("/documents")
+async def bulk_delete_documents(payload: BulkDeleteRequest, db: AsyncSession = Depends(get_db)):
+    """Delete by ids and/or filter; filters remove at most ``MAX_BULK_DELETE_DOCUMENTS``, oldest first."""
+    has_filter = bool(payload.tag and payload.tag.strip()) or payload.created_before is not None
+    if not payload.document_ids and not has_filter:
+        raise HTTPException(status_code=400, detail="document_ids, tag or created_before is required")
+    if len(payload.document_ids) > MAX_BULK_DELETE_DOCUMENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BULK_DELETE_DOCUMENTS} documents can be deleted at once",
+        )
+
+    statement = build_bulk_delete(
+        document_ids=payload.document_ids,
+        tag=payload.tag,
+        created_before=payload.created_before,
+        limit=None if payload.document_ids else MAX_BULK_DELETE_DOCUMENTS,
     )
-    document = result.scalar_one_or_none()
+    deleted = await delete_documents(db, statement)
+    return BulkDeleteResponse(deleted=len(deleted), document_ids=deleted)
 
-    if not document:
-        raise HTTPException(status_code=404, detail="Document not found")
 
-    if document.processing_status:
-        await db.delete(document.processing_status)
-    await db.delete(document)
-    await db.commit()
+@router.delete("/documents/{document_id}")
+async def delete_document(document_id: int, db: AsyncSession = Depends(get_db)):
+    if not await delete_documents(db, build_bulk_delete(document_ids=[document_id])):
+        raise HTTPException(status_code=404, detail="Document not found")
 
     return {"message": "Document deleted"}
@@ -1,28 +1,25 @@
-from fastapi import APIRouter, Depends
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.schemas import SearchResult
-from app.services.search import build_search_query
+from app.database import get_read_db
+from app.services.cache import cached
+from app.services.search_backend import get_search_backend
 
 router = APIRouter()
 
 
 @router.get("/search")
-async def search_documents(q: str, db: AsyncSession = Depends(get_db)):
-    query, params = build_search_query(q)
-    result = await db.execute(query, params)
-    rows = result.fetchall()
-
-    results = []
-    for row in rows:
-        snippet = row[2] or ""
-        results.append(
-            SearchResult(
-                id=row[0],
-                filename=row[1],
-                snippet=snippet,
-            )
-        )
-
-    return results
+async def search_documents(
+    q: str,
+    mode: Literal["fulltext", "ilike", "fuzzy"] = "fulltext",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await cached(
+        "search",
+        [q, mode, limit, cursor],
+        lambda: get_search_backend().search(db, q, mode=mode, limit=limit, cursor=cursor),
+    )
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.schemas import UploadSessionCreate
+from app.services.documents import create_document_from_upload
+from app.services.uploads import (
+    abort_session,
+    append_chunk,
+    create_session,
+    finalize_session,
+    get_session,
+)
+
+router = APIRouter()
+
+
+@router.post("/uploads")
+async def create_upload(payload: UploadSessionCreate):
+    return create_session(payload.filename, payload.size)
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    return get_session(upload_id)
+
+
+@router.put("/uploads/{upload_id}")
+async def upload_chunk(upload_id: str, request: Request, offset: int = Query(..., ge=0)):
+    return await append_chunk(upload_id, offset, request.stream())
+
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload(
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
+    async with finalize_session(upload_id) as stored:
+        document = await create_document_from_upload(stored, db, background_tasks)
+    return {"id": document.id, "filename": document.filename}
+
+
+@router.delete("/uploads/{upload_id}")
+async def cancel_upload(upload_id: str):
+    abort_session(upload_id)
+    return {"message": "Upload cancelled"}
@@ -28,6 +28,35 @@ class DocumentResponse(DocumentBase):
         from_attributes = True
 
 
+class BatchUploadItem(BaseModel):
+    filename: str
+    id: Optional[int] = None
+    status: str
+    error: Optional[str] = None
+
+
+class BatchUploadResponse(BaseModel):
+    items: List[BatchUploadItem]
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int
+
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    filename: str
+    size: int
+    offset: int
+    expires_at: datetime
+
+
+class DocumentListPage(BaseModel):
+    items: List[DocumentResponse]
+    next_cursor: Optional[str] = None
+
+
 class DocumentDetail(DocumentResponse):
     content: Optional[str] = None
 
@@ -41,11 +70,53 @@ class TagResponse(BaseModel):
         from_attributes = True
 
 
+class TagCountResponse(TagResponse):
+    document_count: int
+
+
 class TagCreate(BaseModel):
     name: str
 
 
+class BulkTagRequest(BaseModel):
+    document_ids: List[int]
+    add: List[str] = Field(default_factory=list)
+    remove: List[str] = Field(default_factory=list)
+
+
+class BulkTagResponse(BaseModel):
+    added: int
+    removed: int
+    missing_document_ids: List[int] = Field(default_factory=list)
+
+
+class BulkDeleteRequest(BaseModel):
+    document_ids: List[int] = Field(default_factory=list)
+    tag: Optional[str] = None
+    created_before: Optional[datetime] = None
+
+
+class BulkDeleteResponse(BaseModel):
+    deleted: int
+    document_ids: List[int]
+
+
+class DocumentPageResponse(BaseModel):
+    page_no: int
+    text: str
+
+    class Config:
+        from_attributes = True
+
+
 class SearchResult(BaseModel):
     id: int
     filename: str
     snippet: str
+    pages: List[int] = Field(default_factory=list)
+
+
+class SearchPage(BaseModel):
+    items: List[SearchResult]
+    next_cursor: Optional[str] = None
+    total_estimate: Optional[int] = None
@@ -0,0 +1,197 @@
+"""Read-through cache for hot read endpoints.
+
+Keys embed a generation number that writes bump through ``invalidate()``,
+orphaning every cached entry at once. The default backend keeps entries in
+process but shares the generation through the ``cache_generation`` row on
+the primary, so a bump from ``app.worker`` or ``app.ingest`` reaches every
+API process within ``GENERATION_CHECK_SECONDS``; a process sees its own
+bumps at once. ``MemoryCache`` alone only sees bumps from its own process.
+
+Reads served by a lagging replica can predate the write that bumped the
+generation, so for ``write_settle_seconds()`` after a bump results are
+returned without being cached.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from prometheus_client import Counter
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import REPLICA_LAG_CHECK_SECONDS, engine, read_engine
+
+logger = logging.getLogger(__name__)
+
+# How long a generation read from the primary is reused, so cache hits
+# normally never reach the database.
+GENERATION_CHECK_SECONDS = 1.0
+
+CACHE_REQUESTS = Counter(
+    "docproc_cache_requests",
+    "Read-through cache lookups by namespace and result.",
+    ["namespace", "result"],
+)
+
+
+class Generation(NamedTuple):
+    number: int
+    # Seconds since the last bump.
+    age: float
+
+
+class CacheBackend:
+    """Interface for cache storage shared by ``cached`` and ``invalidate``."""
+
+    async def get(self, key: str) -> Any | None:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def generation(self) -> Generation:
+        raise NotImplementedError
+
+    async def bump_generation(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """Bounded LRU with per-entry expiry, local to one process."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+        self._bumped_at = float("-inf")
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def generation(self) -> Generation:
+        return Generation(self._generation, time.monotonic() - self._bumped_at)
+
+    async def bump_generation(self) -> None:
+        self._generation += 1
+        self._bumped_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SharedGenerationCache(MemoryCache):
+    """In-process entries keyed by the generation stored on the primary.
+
+    The generation is read from the primary at most once per
+    ``GENERATION_CHECK_SECONDS``; the primary is used even when a replica is
+    configured, since a lagging replica would hide bumps.
+    """
+
+    def __init__(self, max_entries: int):
+        super().__init__(max_entries)
+        self._checked_at = float("-inf")
+        self._shared = Generation(0, 0.0)
+
+    def _remember(self, generation: int, age: float) -> Generation:
+        self._checked_at = time.monotonic()
+        self._shared = Generation(generation, age)
+        return self._shared
+
+    async def generation(self) -> Generation:
+        elapsed = time.monotonic() - self._checked_at
+        if elapsed < GENERATION_CHECK_SECONDS:
+            return self._shared._replace(age=self._shared.age + elapsed)
+        async with engine.connect() as conn:
+            row = (
+                await conn.execute(
+                    text(
+                        "SELECT generation, "
+                        "extract(epoch FROM clock_timestamp() - bumped_at) "
+                        "FROM cache_generation WHERE id = 1;"
+                    )
+                )
+            ).one()
+        return self._remember(row[0], float(row[1]))
+
+    async def bump_generation(self) -> None:
+        async with engine.begin() as conn:
+            generation = await conn.scalar(
+                text(
+                    "UPDATE cache_generation "
+                    "SET generation = generation + 1, bumped_at = clock_timestamp() "
+                    "WHERE id = 1 RETURNING generation;"
+                )
+            )
+        self._remember(generation, 0.0)
+
+
+_backend: CacheBackend = SharedGenerationCache(settings.CACHE_MAX_ENTRIES)
+
+
+def set_cache_backend(backend: CacheBackend) -> None:
+    global _backend
+    _backend = backend
+
+
+async def cached(namespace: str, key_parts: list, loader: Callable[[], Awaitable[Any]]) -> Any:
+    if settings.CACHE_TTL_SECONDS <= 0:
+        return await loader()
+
+    try:
+        generation = await _backend.generation()
+    except Exception:
+        logger.warning("Cache generation unavailable; bypassing the cache", exc_info=True)
+        return await loader()
+    # Reading the generation first means a write committed while loading
+    # orphans this entry instead of being hidden by it.
+    key = f"{namespace}:{generation.number}:{json.dumps(key_parts, default=str)}"
+    value = await _backend.get(key)
+    if value is not None:
+        CACHE_REQUESTS.labels(namespace, "hit").inc()
+        return value
+
+    CACHE_REQUESTS.labels(namespace, "miss").inc()
+    value = await loader()
+    if generation.age >= write_settle_seconds():
+        await _backend.set(key, value, settings.CACHE_TTL_SECONDS)
+    return value
+
+
+def write_settle_seconds() -> float:
+    """How long after a bump a replica read may still miss the write.
+
+    Replica lag is re-measured every ``REPLICA_LAG_CHECK_SECONDS``, so it can
+    exceed ``DATABASE_READ_MAX_LAG_SECONDS`` by that much before reads move
+    to the primary. With ``DATABASE_READ_MAX_LAG_SECONDS=0`` lag is not
+    bounded at all and only the check interval is waited out.
+    """
+    if read_engine is engine:
+        return 0.0
+    return settings.DATABASE_READ_MAX_LAG_SECONDS + REPLICA_LAG_CHECK_SECONDS
+
+
+async def invalidate() -> None:
+    if settings.CACHE_TTL_SECONDS <= 0:
+        return
+    try:
+        await _backend.bump_generation()
+    except Exception:
+        # The write has already committed; entries expire after the TTL.
+        logger.exception("Failed to bump the cache generation")
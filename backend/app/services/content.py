@@ -0,0 +1,105 @@
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import DocumentPage
+
+# Pages fetched per query while streaming; bounds memory to a few pages at a time.
+PAGES_PER_FETCH = 20
+
+
+def parse_range(header: str, total: int) -> tuple[int, int] | None:
+    """Parse a single ``bytes=`` range into inclusive offsets.
+
+    Returns ``None`` for headers we do not honour (other units, multiple
+    ranges), in which case the whole body is served. Raises 416 when the
+    range lies outside the content.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else total - 1
+        else:
+            suffix = int(last)
+            if suffix <= 0:
+                raise _unsatisfiable(total)
+            start = max(total - suffix, 0)
+            end = total - 1
+    except ValueError:
+        return None
+    if start < 0 or start > end or start >= total:
+        raise _unsatisfiable(total)
+    return start, min(end, total - 1)
+
+
+def _unsatisfiable(total: int) -> HTTPException:
+    return HTTPException(
+        status_code=416,
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{total}"},
+    )
+
+
+async def load_content(db: AsyncSession, document_id: int) -> str:
+    """The whole extracted text, assembled from its pages."""
+    result = await db.execute(
+        select(DocumentPage.text)
+        .where(DocumentPage.document_id == document_id)
+        .order_by(DocumentPage.page_no)
+    )
+    return "".join(result.scalars().all())
+
+
+async def load_page_sizes(db: AsyncSession, document_id: int) -> list[tuple[int, int]]:
+    """Return ``(page_no, byte_length)`` for every stored page, in order."""
+    result = await db.execute(
+        select(DocumentPage.page_no, func.octet_length(DocumentPage.text))
+        .where(DocumentPage.document_id == document_id)
+        .order_by(DocumentPage.page_no)
+    )
+    return [(row[0], row[1]) for row in result.all()]
+
+
+async def iter_content(
+    session_factory,
+    document_id: int,
+    page_sizes: list[tuple[int, int]],
+    start: int,
+    end: int,
+) -> AsyncIterator[bytes]:
+    """Yield UTF-8 bytes ``start..end`` (inclusive) of the document text."""
+    wanted = []
+    offset = 0
+    for page_no, size in page_sizes:
+        if offset + size > start and offset <= end:
+            wanted.append((page_no, offset))
+        offset += size
+        if offset > end:
+            break
+
+    # The request-scoped session is closed before the body is sent, so the
+    # stream uses its own.
+    async with session_factory() as db:
+        for index in range(0, len(wanted), PAGES_PER_FETCH):
+            batch = wanted[index:index + PAGES_PER_FETCH]
+            result = await db.execute(
+                select(DocumentPage.page_no, DocumentPage.text)
+                .where(
+                    DocumentPage.document_id == document_id,
+                    DocumentPage.page_no.between(batch[0][0], batch[-1][0]),
+                )
+                .order_by(DocumentPage.page_no)
+            )
+            offsets = dict(batch)
+            for page_no, page_text in result.all():
+                page_start = offsets[page_no]
+                data = page_text.encode("utf-8")
+                yield data[max(start - page_start, 0):end - page_start + 1]
@@ -1,78 +1,483 @@
+import logging
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 
+from sqlalchemy import (
+    JSON,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    tuple_,
+    type_coerce,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import BackgroundTasks, HTTPException
 
+from app.admission import extraction_finished, extraction_scheduled
 from app.config import settings
-from app.models import Document, ProcessingStatus
-from app.services.pdf_processor import extract_text_from_pdf
-from app.services.storage import save_upload
+from app.metrics import observe_extraction
+from app.models import Document, DocumentPage, ProcessingStatus, Tag, document_tags
+from app.schemas import BatchUploadItem
+from app.services.cache import invalidate
+from app.services.extraction import ExtractionFailed
+from app.services.jobs import enqueue_job, enqueue_jobs
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.pdf_processor import extract_pages_from_pdf
+from app.services.search import refresh_search_vectors
+from app.services.search_backend import sync_search_index
+from app.services.storage import StoredUpload, sanitize_filename, save_upload
+from app.services.versions import touch_documents
 
+logger = logging.getLogger(__name__)
 
-async def _parse_document(document_id: int, file_path: str) -> None:
+PAGE_INSERT_BATCH_SIZE = 500
+
+
+async def _parse_document(
+    document_id: int,
+    file_path: str | None,
+    data: bytes | None = None,
+    file_size: int = 0,
+) -> None:
     from app.database import async_session
 
-    async with async_session() as session:
-        await _parse_document_with_session(document_id, file_path, session)
+    try:
+        async with async_session() as session:
+            await _parse_document_with_session(document_id, file_path, session, data)
+    except Exception as exc:
+        # Background tasks run one after another; an exception here would
+        # skip every extraction scheduled after this one.
+        logger.exception("Background extraction of document %s failed", document_id)
+        try:
+            async with async_session() as session:
+                await _mark_failed(document_id, f"Extraction failed: {exc}", session)
+        except Exception:
+            logger.exception("Could not mark document %s as failed", document_id)
+    finally:
+        remove_upload(file_path)
+        extraction_finished(file_size)
+
+
+def _schedule_parse(
+    background_tasks: BackgroundTasks,
+    document_id: int,
+    stored: StoredUpload,
+) -> None:
+    extraction_scheduled(stored.file_size)
+    background_tasks.add_task(
+        _parse_document, document_id, stored.file_path, stored.data, stored.file_size
+    )
+
+
+def remove_upload(file_path: str | None) -> None:
+    if file_path and os.path.exists(file_path):
+        os.remove(file_path)
+
+
+async def _get_status(document_id: int, db: AsyncSession) -> ProcessingStatus | None:
+    result = await db.execute(
+        select(ProcessingStatus).where(ProcessingStatus.document_id == document_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _mark_failed(document_id: int, error_message: str, db: AsyncSession) -> None:
+    status = await _get_status(document_id, db)
+    if status:
+        status.status = "failed"
+        status.error_message = error_message
+        status.processed_at = datetime.utcnow()
+        await touch_documents(db, [document_id])
+        await db.commit()
+
+
+async def _store_pages(document_id: int, pages: list[str], db: AsyncSession) -> None:
+    await db.execute(delete(DocumentPage).where(DocumentPage.document_id == document_id))
+    for start in range(0, len(pages), PAGE_INSERT_BATCH_SIZE):
+        batch = pages[start:start + PAGE_INSERT_BATCH_SIZE]
+        await db.execute(
+            insert(DocumentPage),
+            [
+                {"document_id": document_id, "page_no": start + offset + 1, "text": page_text}
+                for offset, page_text in enumerate(batch)
+            ],
+        )
 
 
 async def _parse_document_with_session(
     document_id: int,
-    file_path: str,
+    file_path: str | None,
     db: AsyncSession,
+    data: bytes | None = None,
+    raise_retryable: bool = False,
 ) -> None:
+    """Extract and store a document's text.
+
+    Failures mark the document failed. With ``raise_retryable`` (the queue
+    worker), crashed or unstartable extraction workers are raised instead so
+    the job can be retried; the document is only marked failed once attempts
+    run out. Timeouts and memory-limit hits are terminal: the same PDF would
+    hit them again.
+    """
+    started = time.perf_counter()
     try:
-        text_content, page_count = await extract_text_from_pdf(file_path)
+        pages = await extract_pages_from_pdf(data if data is not None else file_path)
     except ValueError:
-        status = await db.get(ProcessingStatus, document_id)
-        if status:
-            status.status = "failed"
-            status.error_message = "Invalid or corrupted PDF"
-            status.processed_at = datetime.utcnow()
-            await db.commit()
+        observe_extraction("invalid", time.perf_counter() - started)
+        await _mark_failed(document_id, "Invalid or corrupted PDF", db)
         return
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    except TimeoutError as exc:
+        observe_extraction("timeout", time.perf_counter() - started)
+        await _mark_failed(document_id, str(exc) or "PDF extraction timed out", db)
+        return
+    except ExtractionFailed as exc:
+        observe_extraction("crashed", time.perf_counter() - started)
+        if raise_retryable and exc.retryable:
+            raise
+        await _mark_failed(document_id, str(exc), db)
+        return
+    observe_extraction("completed", time.perf_counter() - started, len(pages))
 
     document = await db.get(Document, document_id)
     if document:
-        document.content = text_content
-        document.page_count = page_count
-        await db.commit()
+        document.page_count = len(pages)
+        await _store_pages(document_id, pages, db)
 
-    status = await db.get(ProcessingStatus, document_id)
+    status = await _get_status(document_id, db)
     if status:
         status.status = "completed"
         status.processed_at = datetime.utcnow()
-        await db.commit()
+    await touch_documents(db, [document_id])
+    await db.commit()
+    if document:
+        await sync_search_index(db, [document_id])
+    await invalidate()
+
+
+async def find_reusable_extraction(db: AsyncSession, content_hash: str):
+    """Return ``(id, page_count)`` of a completed document with the same bytes."""
+    result = await db.execute(
+        select(Document.id, Document.page_count)
+        .join(ProcessingStatus, ProcessingStatus.document_id == Document.id)
+        .where(Document.content_hash == content_hash, ProcessingStatus.status == "completed")
+        .order_by(Document.id)
+        .limit(1)
+    )
+    return result.first()
+
+
+async def _copy_extraction(db: AsyncSession, source_id: int, target_id: int) -> None:
+    await db.execute(
+        insert(DocumentPage).from_select(
+            ["document_id", "page_no", "text"],
+            select(literal(target_id), DocumentPage.page_no, DocumentPage.text).where(
+                DocumentPage.document_id == source_id
+            ),
+        )
+    )
+
+
+def _inline_max_bytes() -> int:
+    # Queue workers run in other processes and need the file on disk.
+    if settings.EXTRACTION_MODE == "background":
+        return settings.INLINE_EXTRACTION_MAX_BYTES
+    return 0
 
 
 async def create_document(file, db: AsyncSession, background_tasks: BackgroundTasks | None = None) -> Document:
-    file_path, file_size, original_name = await save_upload(
+    stored = await save_upload(
         file,
         settings.UPLOAD_DIR,
         settings.MAX_UPLOAD_BYTES,
+        inline_max_bytes=_inline_max_bytes(),
     )
+    return await create_document_from_upload(stored, db, background_tasks)
+
+
+async def create_document_from_upload(
+    stored: StoredUpload,
+    db: AsyncSession,
+    background_tasks: BackgroundTasks | None = None,
+) -> Document:
+    reusable = await find_reusable_extraction(db, stored.content_hash)
 
     document = Document(
-        filename=original_name,
-        file_size=file_size,
+        filename=stored.original_name,
+        file_size=stored.file_size,
+        content_hash=stored.content_hash,
+        page_count=reusable.page_count if reusable else None,
     )
     db.add(document)
-    await db.commit()
-    await db.refresh(document)
+    await db.flush()
+
+    if reusable:
+        # Same bytes were already extracted; reuse the text instead of parsing again.
+        await _copy_extraction(db, reusable.id, document.id)
+        db.add(
+            ProcessingStatus(
+                document_id=document.id,
+                status="completed",
+                processed_at=datetime.utcnow(),
+            )
+        )
+        await refresh_search_vectors(db, [document.id])
+        await db.commit()
+        await sync_search_index(db, [document.id])
+        await invalidate()
+        remove_upload(stored.file_path)
+        return document
 
     processing_status = ProcessingStatus(
         document_id=document.id,
         status="processing",
     )
     db.add(processing_status)
+    await refresh_search_vectors(db, [document.id])
+
+    if settings.EXTRACTION_MODE == "queue":
+        enqueue_job(db, document.id, stored.file_path)
     await db.commit()
+    await sync_search_index(db, [document.id])
+    await invalidate()
 
-    if background_tasks is None:
-        background_tasks = BackgroundTasks()
-    background_tasks.add_task(_parse_document, document.id, file_path)
+    if settings.EXTRACTION_MODE == "queue":
+        extraction_scheduled(stored.file_size)
+    else:
+        if background_tasks is None:
+            background_tasks = BackgroundTasks()
+        _schedule_parse(background_tasks, document.id, stored)
 
     return document
+
+
+async def create_documents_batch(
+    files: list,
+    db: AsyncSession,
+    background_tasks: BackgroundTasks | None = None,
+) -> list[BatchUploadItem]:
+    """Store many uploads and register them with one transaction.
+
+    Files that fail validation are reported individually and do not abort
+    the rest of the batch. Files identical to an earlier one in the same
+    batch are not stored again; they are reported as ``duplicate`` with the
+    earlier file's document id.
+    """
+    results: list[BatchUploadItem] = []
+    stored_uploads: list[tuple[int, StoredUpload]] = []
+    duplicates: list[tuple[int, int]] = []
+    first_by_hash: dict[str, int] = {}
+    try:
+        for file in files:
+            try:
+                # Batches always go to disk so hundreds of queued parses don't pin bytes in memory.
+                stored = await save_upload(file, settings.UPLOAD_DIR, settings.MAX_UPLOAD_BYTES)
+            except HTTPException as exc:
+                results.append(
+                    BatchUploadItem(
+                        filename=sanitize_filename(file.filename),
+                        status="rejected",
+                        error=str(exc.detail),
+                    )
+                )
+                continue
+            first = first_by_hash.get(stored.content_hash)
+            if first is not None:
+                remove_upload(stored.file_path)
+                duplicates.append((len(results), first))
+                results.append(BatchUploadItem(filename=stored.original_name, status="duplicate"))
+                continue
+            first_by_hash[stored.content_hash] = len(results)
+            stored_uploads.append((len(results), stored))
+            results.append(BatchUploadItem(filename=stored.original_name, status="processing"))
+
+        if not stored_uploads:
+            return results
+        reusable, document_ids, pending_uploads = await _register_batch(
+            db, stored_uploads, results
+        )
+    except BaseException:
+        # Nothing was committed, so no job or background task will ever read these files.
+        for _, stored in stored_uploads:
+            remove_upload(stored.file_path)
+        raise
+
+    for index, first in duplicates:
+        results[index].id = results[first].id
+    await sync_search_index(db, document_ids)
+    await invalidate()
+
+    for _, stored in stored_uploads:
+        if stored.content_hash in reusable:
+            remove_upload(stored.file_path)
+
+    if settings.EXTRACTION_MODE == "queue":
+        for _, stored in pending_uploads:
+            extraction_scheduled(stored.file_size)
+    else:
+        if background_tasks is None:
+            background_tasks = BackgroundTasks()
+        for document_id, stored in pending_uploads:
+            _schedule_parse(background_tasks, document_id, stored)
+
+    return results
+
+
+async def _register_batch(
+    db: AsyncSession,
+    stored_uploads: list[tuple[int, StoredUpload]],
+    results: list[BatchUploadItem],
+):
+    """Insert documents, statuses and jobs for stored uploads and commit.
+
+    Returns the reusable extractions by hash, the new document ids and the
+    uploads that still need extracting.
+    """
+    hashes = {stored.content_hash for _, stored in stored_uploads}
+    reusable_result = await db.execute(
+        select(Document.content_hash, Document.id, Document.page_count)
+        .join(ProcessingStatus, ProcessingStatus.document_id == Document.id)
+        .where(Document.content_hash.in_(hashes), ProcessingStatus.status == "completed")
+        .order_by(Document.content_hash, Document.id)
+        .distinct(Document.content_hash)
+    )
+    reusable = {row.content_hash: row for row in reusable_result.all()}
+
+    inserted = await db.execute(
+        insert(Document).returning(Document.id, sort_by_parameter_order=True),
+        [
+            {
+                "filename": stored.original_name,
+                "file_size": stored.file_size,
+                "content_hash": stored.content_hash,
+                "page_count": (
+                    reusable[stored.content_hash].page_count
+                    if stored.content_hash in reusable
+                    else None
+                ),
+            }
+            for _, stored in stored_uploads
+        ],
+    )
+    document_ids = inserted.scalars().all()
+
+    now = datetime.utcnow()
+    statuses = []
+    pending_jobs: list[tuple[int, str]] = []
+    pending_uploads: list[tuple[int, StoredUpload]] = []
+    for (index, stored), document_id in zip(stored_uploads, document_ids):
+        results[index].id = document_id
+        source = reusable.get(stored.content_hash)
+        if source:
+            await _copy_extraction(db, source.id, document_id)
+            statuses.append({"document_id": document_id, "status": "completed", "processed_at": now})
+            results[index].status = "completed"
+        else:
+            statuses.append({"document_id": document_id, "status": "processing"})
+            pending_jobs.append((document_id, stored.file_path))
+            pending_uploads.append((document_id, stored))
+
+    await db.execute(insert(ProcessingStatus), statuses)
+    await refresh_search_vectors(db, document_ids)
+    if settings.EXTRACTION_MODE == "queue":
+        await enqueue_jobs(db, pending_jobs)
+    await db.commit()
+    return reusable, document_ids, pending_uploads
+
+
+def as_naive_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC (datetime.utcnow).
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _tag_summaries():
+    """Correlated subquery returning a document's tags as a JSON array."""
+    return (
+        select(
+            func.coalesce(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object("id", Tag.id, "name", Tag.name),
+                        Tag.name,
+                    )
+                ),
+                literal_column("'[]'::json"),
+            )
+        )
+        .select_from(document_tags.join(Tag, Tag.id == document_tags.c.tag_id))
+        .where(document_tags.c.document_id == Document.id)
+        .scalar_subquery()
+    )
+
+
+def build_document_list_query(
+    limit: int,
+    after: tuple[datetime, int] | None = None,
+    tags: list[str] | None = None,
+    tag_mode: str = "all",
+    status: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+):
+    """Newest-first keyset page over ``ix_documents_created_at``.
+
+    ``tags`` filters to documents carrying every name (``tag_mode="all"``)
+    or at least one of them (``"any"``).
+
+    Selects only the columns ``DocumentResponse`` needs (plus ``version``
+    for the page ETag), so neither page text nor ``search_vector`` is read,
+    and aggregates status and tags in the same statement.
+    """
+    query = (
+        select(
+            Document.id,
+            Document.filename,
+            Document.file_size,
+            Document.page_count,
+            Document.created_at,
+            Document.version,
+            func.coalesce(ProcessingStatus.status, "unknown").label("status"),
+            type_coerce(_tag_summaries(), JSON).label("tags"),
+        )
+        .select_from(Document)
+        .outerjoin(ProcessingStatus, ProcessingStatus.document_id == Document.id)
+    )
+    names = list(dict.fromkeys(name.strip().lower() for name in tags or [] if name.strip()))
+    if names:
+        matching = (
+            select(document_tags.c.document_id)
+            .join(Tag, Tag.id == document_tags.c.tag_id)
+            .where(Tag.name.in_(names))
+        )
+        if tag_mode == "all" and len(names) > 1:
+            matching = matching.group_by(document_tags.c.document_id).having(
+                func.count() == len(names)
+            )
+        query = query.where(Document.id.in_(matching))
+    if status:
+        query = query.where(ProcessingStatus.status == status)
+    if created_after:
+        query = query.where(Document.created_at >= as_naive_utc(created_after))
+    if created_before:
+        query = query.where(Document.created_at < as_naive_utc(created_before))
+    if after is not None:
+        query = query.where(tuple_(Document.created_at, Document.id) < tuple_(*after))
+    return query.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit)
+
+
+def encode_document_cursor(row) -> str:
+    return encode_cursor({"created_at": row.created_at.isoformat(), "id": row.id})
+
+
+def decode_document_cursor(cursor: str) -> tuple[datetime, int]:
+    values = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(values["created_at"]), int(values["id"])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
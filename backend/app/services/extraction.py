@@ -0,0 +1,223 @@
+import asyncio
+import multiprocessing
+import queue
+import re
+import resource
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.config import settings
+
+
+# MuPDF reports allocation failures as RuntimeError("malloc of N bytes failed") and similar.
+_ALLOCATION_FAILURE = re.compile(r"\b(?:malloc|calloc|realloc)\b.*\bfailed\b|out of memory", re.IGNORECASE)
+
+
+class ExtractionFailed(Exception):
+    """Extraction could not finish (resource limit, crashed worker, unreadable content); the message is the reason.
+
+    ``retryable`` marks failures that may not recur on another attempt, such as a lost worker.
+    """
+
+    def __init__(self, message: str, retryable: bool = False) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+    def __reduce__(self):
+        return self.__class__, (str(self), self.retryable)
+
+
+def is_memory_error(exc: BaseException) -> bool:
+    """True for Python and MuPDF allocation failures, e.g. under the worker's rlimit."""
+    return isinstance(exc, MemoryError) or (
+        isinstance(exc, RuntimeError) and bool(_ALLOCATION_FAILURE.search(str(exc)))
+    )
+
+
+def _serve(conn, memory_limit_bytes: int | None) -> None:
+    """Worker process loop: run ``(func, args)`` messages until told to stop."""
+    # Ctrl+C reaches the whole process group; only the parent should react.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if memory_limit_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+    # Signal readiness so interpreter start-up is not charged to the first job's timeout.
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        func, args = message
+        try:
+            result = ("ok", func(*args))
+        except Exception as exc:
+            result = ("memory", None) if is_memory_error(exc) else ("error", exc)
+        try:
+            conn.send(result)
+        except Exception as exc:
+            conn.send(("error", ExtractionFailed(f"Unpicklable extraction result: {exc!r}")))
+
+
+class _Worker:
+    def __init__(self, process, conn) -> None:
+        self.process = process
+        self.conn = conn
+        self.tasks = 0
+
+
+class ExtractionEngine:
+    """Runs CPU-bound extraction work in killable worker processes.
+
+    Each process runs under an address-space rlimit. A job that outlives
+    ``timeout`` has its process killed and replaced, so one pathological
+    PDF cannot hold a slot or leak memory into later jobs. Jobs beyond
+    ``max_workers`` wait for a free process and are reported through
+    ``pending``.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_tasks_per_child: int | None = None,
+        timeout: float | None = None,
+        memory_limit_mb: int | None = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_tasks_per_child = max_tasks_per_child or None
+        self.timeout = timeout or None
+        self.memory_limit_mb = memory_limit_mb or None
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._dispatch: ThreadPoolExecutor | None = None
+        self._idle: queue.SimpleQueue | None = None
+        self._workers: set[_Worker] = set()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _start(self) -> tuple[ThreadPoolExecutor, queue.SimpleQueue]:
+        with self._lock:
+            if self._dispatch is None:
+                # One dispatch thread per process slot; ``None`` marks a slot
+                # whose process is started on first use.
+                self._dispatch = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="extraction",
+                )
+                self._idle = queue.SimpleQueue()
+                for _ in range(self.max_workers):
+                    self._idle.put(None)
+            return self._dispatch, self._idle
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        memory_limit = self.memory_limit_mb * 1024 * 1024 if self.memory_limit_mb else None
+        process = self._context.Process(
+            target=_serve,
+            args=(child_conn, memory_limit),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        try:
+            parent_conn.recv()
+        except (EOFError, OSError):
+            process.join(5)
+            parent_conn.close()
+            raise ExtractionFailed(
+                f"PDF extraction worker failed to start (exit code {process.exitcode})",
+                retryable=True,
+            )
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _kill(self, worker: _Worker) -> int | None:
+        worker.process.kill()
+        worker.process.join(5)
+        worker.conn.close()
+        with self._lock:
+            self._workers.discard(worker)
+        return worker.process.exitcode
+
+    def _retire(self, worker: _Worker) -> None:
+        try:
+            worker.conn.send(None)
+        except OSError:
+            pass
+        worker.process.join(5)
+        self._kill(worker)
+
+    def _run_sync(self, idle: queue.SimpleQueue, func: Callable[..., Any], args: tuple) -> Any:
+        worker = idle.get()
+        try:
+            if worker is not None and not worker.process.is_alive():
+                self._kill(worker)
+                worker = None
+            if worker is None:
+                worker = self._spawn()
+            try:
+                worker.conn.send((func, args))
+                finished = worker.conn.poll(self.timeout)
+                if finished:
+                    status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                exitcode = self._kill(worker)
+                worker = None
+                raise ExtractionFailed(
+                    f"PDF extraction worker crashed (exit code {exitcode})", retryable=True
+                )
+            if not finished:
+                self._kill(worker)
+                worker = None
+                raise TimeoutError(f"PDF extraction timed out after {self.timeout:g}s")
+
+            worker.tasks += 1
+            if status == "memory":
+                self._kill(worker)
+                worker = None
+                raise ExtractionFailed(
+                    f"PDF extraction exceeded the {self.memory_limit_mb} MB memory limit"
+                )
+            if self.max_tasks_per_child and worker.tasks >= self.max_tasks_per_child:
+                self._retire(worker)
+                worker = None
+            if status == "error":
+                raise payload
+            return payload
+        finally:
+            idle.put(worker)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        dispatch, idle = self._start()
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        try:
+            return await loop.run_in_executor(dispatch, self._run_sync, idle, func, args)
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            dispatch, self._dispatch, self._idle = self._dispatch, None, None
+            workers = list(self._workers)
+        for worker in workers:
+            self._kill(worker)
+        if dispatch is not None:
+            dispatch.shutdown(wait=False, cancel_futures=True)
+
+
+extraction_engine = ExtractionEngine(
+    max_workers=settings.EXTRACTION_WORKERS,
+    max_tasks_per_child=settings.EXTRACTION_MAX_TASKS_PER_CHILD,
+    timeout=settings.EXTRACTION_TIMEOUT_SECONDS,
+    memory_limit_mb=settings.EXTRACTION_MEMORY_LIMIT_MB,
+)
@@ -0,0 +1,361 @@
+"""Embedded inverted index with BM25 ranking.
+
+Postings live in a SQLite file so several processes on one host (API
+workers, extraction workers) can share the index. Each document is
+replaced atomically: its old postings are dropped and new ones written
+in one SQLite transaction, together with the corpus statistics BM25
+needs. Writes carry the document's ``version``, and one older than the
+indexed copy is ignored, so a slow writer cannot overwrite a newer
+update. Deleted ids are kept as tombstones and never written again, so a
+write that read a document just before it was deleted cannot bring it
+back; Postgres never reuses document ids. All methods are blocking; async
+callers run them in a thread.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import NamedTuple
+
+# Standard BM25 parameters.
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Term frequency multipliers mirroring the A/B/C weights of the SQL search vector.
+FILENAME_BOOST = 3
+TAG_BOOST = 2
+# Page numbers stored per posting; search reports at most this many hit pages.
+MAX_POSTING_PAGES = 50
+SNIPPET_CHARS = 200
+# Parameters per ``IN (...)`` list, below SQLite's default variable limit.
+_SQLITE_BATCH = 500
+
+_TOKEN = re.compile(r"\w+")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS docs ("
+    "doc_id INTEGER PRIMARY KEY, filename TEXT NOT NULL, snippet TEXT NOT NULL, "
+    "length INTEGER NOT NULL, version INTEGER NOT NULL DEFAULT 0, tags TEXT)",
+    "CREATE TABLE IF NOT EXISTS postings ("
+    "term TEXT NOT NULL, doc_id INTEGER NOT NULL, tf INTEGER NOT NULL, pages TEXT NOT NULL, "
+    "PRIMARY KEY (term, doc_id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS postings_doc_id ON postings (doc_id)",
+    "CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS tombstones (doc_id INTEGER PRIMARY KEY)",
+    "INSERT OR IGNORE INTO stats (key, value) VALUES ('documents', 0), ('length', 0)",
+)
+
+
+class IndexDocument(NamedTuple):
+    id: int
+    version: int
+    filename: str
+    tags: list[str]
+    pages: list[str]
+
+
+class IndexMetadata(NamedTuple):
+    id: int
+    version: int
+    filename: str
+    tags: list[str]
+
+
+class IndexHit(NamedTuple):
+    id: int
+    filename: str
+    snippet: str
+    pages: list[int]
+    rank: float
+
+
+def tokenize(value: str) -> list[str]:
+    return _TOKEN.findall(value.lower().replace("_", " "))
+
+
+def _metadata_counts(filename: str, tags: list[str]) -> Counter[str]:
+    counts: Counter[str] = Counter()
+    for token in tokenize(filename):
+        counts[token] += FILENAME_BOOST
+    for tag in tags:
+        for token in tokenize(tag):
+            counts[token] += TAG_BOOST
+    return counts
+
+
+class InvertedIndex:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction(write=True) as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(docs)")}
+            if "version" not in columns:
+                # Files created before versions were tracked accept any write once.
+                conn.execute("ALTER TABLE docs ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            if "tags" not in columns:
+                # Without stored tags, metadata updates fall back to a full write.
+                conn.execute("ALTER TABLE docs ADD COLUMN tags TEXT")
+
+    @contextmanager
+    def _transaction(self, write: bool = False):
+        # Short-lived connections keep this safe to call from any thread.
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # IMMEDIATE takes the write lock up front, so the statistics read
+            # while removing a document cannot change before they are updated.
+            conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def replace_document(
+        self,
+        doc_id: int,
+        filename: str,
+        tags: list[str],
+        pages: list[str],
+        version: int = 1,
+    ) -> None:
+        self.replace_documents([IndexDocument(doc_id, version, filename, tags, pages)])
+
+    def replace_documents(self, documents: list[IndexDocument]) -> None:
+        """Index documents in one transaction, skipping any older than their indexed copy."""
+        with self._transaction(write=True) as conn:
+            for document in documents:
+                self._write(conn, document)
+
+    def _write(self, conn: sqlite3.Connection, document: IndexDocument) -> None:
+        doc_id, version, filename, tags, pages = document
+        if self._deleted(conn, doc_id):
+            return
+        indexed = conn.execute("SELECT version FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        if indexed is not None and indexed[0] > version:
+            return
+
+        term_counts = _metadata_counts(filename, tags)
+        term_pages: dict[str, list[int]] = defaultdict(list)
+        for page_no, page_text in enumerate(pages, start=1):
+            page_counts = Counter(tokenize(page_text))
+            term_counts.update(page_counts)
+            for token in page_counts:
+                if len(term_pages[token]) < MAX_POSTING_PAGES:
+                    term_pages[token].append(page_no)
+
+        length = sum(term_counts.values())
+        snippet = "".join(pages)[:SNIPPET_CHARS]
+        self._remove(conn, [doc_id])
+        conn.execute(
+            "INSERT INTO docs (doc_id, filename, snippet, length, version, tags) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (doc_id, filename, snippet, length, version, json.dumps(tags)),
+        )
+        conn.executemany(
+            "INSERT INTO postings (term, doc_id, tf, pages) VALUES (?, ?, ?, ?)",
+            (
+                (term, doc_id, tf, ",".join(map(str, term_pages.get(term, ()))))
+                for term, tf in term_counts.items()
+            ),
+        )
+        conn.execute("UPDATE stats SET value = value + 1 WHERE key = 'documents'")
+        conn.execute("UPDATE stats SET value = value + ? WHERE key = 'length'", (length,))
+
+    def update_metadata(self, documents: list[IndexMetadata]) -> list[int]:
+        """Re-index only filename and tags, leaving page postings alone.
+
+        Returns the ids that need a full ``replace_documents`` because they
+        are not indexed yet (or were indexed without their tags).
+        """
+        needs_full_write = []
+        with self._transaction(write=True) as conn:
+            for document in documents:
+                if not self._update_metadata(conn, document):
+                    needs_full_write.append(document.id)
+        return needs_full_write
+
+    def _update_metadata(self, conn: sqlite3.Connection, document: IndexMetadata) -> bool:
+        doc_id, version, filename, tags = document
+        if self._deleted(conn, doc_id):
+            return True
+        row = conn.execute(
+            "SELECT version, filename, tags FROM docs WHERE doc_id = ?", (doc_id,)
+        ).fetchone()
+        if row is None or row[2] is None:
+            return False
+        if row[0] > version:
+            return True
+
+        old_counts = _metadata_counts(row[1], json.loads(row[2]))
+        new_counts = _metadata_counts(filename, tags)
+        length_change = 0
+        for term in old_counts.keys() | new_counts.keys():
+            change = new_counts[term] - old_counts[term]
+            if not change:
+                continue
+            length_change += change
+            posting = conn.execute(
+                "SELECT tf FROM postings WHERE term = ? AND doc_id = ?", (term, doc_id)
+            ).fetchone()
+            if posting is None:
+                conn.execute(
+                    "INSERT INTO postings (term, doc_id, tf, pages) VALUES (?, ?, ?, '')",
+                    (term, doc_id, change),
+                )
+            elif posting[0] + change > 0:
+                conn.execute(
+                    "UPDATE postings SET tf = ? WHERE term = ? AND doc_id = ?",
+                    (posting[0] + change, term, doc_id),
+                )
+            else:
+                conn.execute("DELETE FROM postings WHERE term = ? AND doc_id = ?", (term, doc_id))
+        conn.execute(
+            "UPDATE docs SET filename = ?, tags = ?, version = ?, length = length + ? "
+            "WHERE doc_id = ?",
+            (filename, json.dumps(tags), version, length_change, doc_id),
+        )
+        conn.execute("UPDATE stats SET value = value + ? WHERE key = 'length'", (length_change,))
+        return True
+
+    def delete_documents(self, doc_ids: list[int]) -> None:
+        with self._transaction(write=True) as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO tombstones (doc_id) VALUES (?)",
+                ((doc_id,) for doc_id in doc_ids),
+            )
+            self._remove(conn, doc_ids)
+
+    def _deleted(self, conn: sqlite3.Connection, doc_id: int) -> bool:
+        row = conn.execute("SELECT 1 FROM tombstones WHERE doc_id = ?", (doc_id,)).fetchone()
+        return row is not None
+
+    def _remove(self, conn: sqlite3.Connection, doc_ids: list[int]) -> None:
+        for start in range(0, len(doc_ids), _SQLITE_BATCH):
+            batch = list(doc_ids[start : start + _SQLITE_BATCH])
+            marks = ",".join("?" * len(batch))
+            removed, length = conn.execute(
+                f"SELECT count(*), coalesce(sum(length), 0) FROM docs WHERE doc_id IN ({marks})",
+                batch,
+            ).fetchone()
+            if not removed:
+                continue
+            conn.execute(f"DELETE FROM postings WHERE doc_id IN ({marks})", batch)
+            conn.execute(f"DELETE FROM docs WHERE doc_id IN ({marks})", batch)
+            conn.execute("UPDATE stats SET value = value - ? WHERE key = 'documents'", (removed,))
+            conn.execute("UPDATE stats SET value = value - ? WHERE key = 'length'", (length,))
+
+    def document_ids(self) -> set[int]:
+        with self._transaction() as conn:
+            return {row[0] for row in conn.execute("SELECT doc_id FROM docs")}
+
+    def clear(self) -> None:
+        with self._transaction(write=True) as conn:
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM docs")
+            conn.execute("UPDATE stats SET value = 0")
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        after: tuple[float, int] | None = None,
+    ) -> tuple[list[IndexHit], int]:
+        """Documents containing every query term, best BM25 score first.
+
+        Returns one page of hits (ordered by ``(rank, id)`` descending,
+        strictly after ``after``) and the total number of matches.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], 0
+
+        with self._transaction() as conn:
+            stats = dict(conn.execute("SELECT key, value FROM stats"))
+            documents = stats.get("documents", 0)
+            if not documents:
+                return [], 0
+            average_length = max(stats["length"] / documents, 1)
+
+            postings = []
+            for term in terms:
+                rows = conn.execute(
+                    "SELECT postings.doc_id, postings.tf, docs.length FROM postings "
+                    "JOIN docs ON docs.doc_id = postings.doc_id WHERE postings.term = ?",
+                    (term,),
+                ).fetchall()
+                if not rows:
+                    return [], 0
+                postings.append(rows)
+
+            # Intersect from the rarest term so the candidate set only shrinks.
+            postings.sort(key=len)
+            scores: dict[int, float] | None = None
+            for rows in postings:
+                df = len(rows)
+                idf = math.log(1 + (documents - df + 0.5) / (df + 0.5))
+                term_scores = {}
+                for doc_id, tf, length in rows:
+                    if scores is not None and doc_id not in scores:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    term_scores[doc_id] = idf * tf * (BM25_K1 + 1) / (tf + norm)
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {doc_id: scores[doc_id] + score for doc_id, score in term_scores.items()}
+                if not scores:
+                    return [], 0
+
+            total = len(scores)
+            candidates = scores.items()
+            if after is not None:
+                candidates = [(doc_id, score) for doc_id, score in candidates if (score, doc_id) < after]
+            top = heapq.nlargest(limit, candidates, key=lambda item: (item[1], item[0]))
+            return self._hits(conn, top, terms), total
+
+    def _hits(
+        self,
+        conn: sqlite3.Connection,
+        top: list[tuple[int, float]],
+        terms: list[str],
+    ) -> list[IndexHit]:
+        if not top:
+            return []
+        doc_ids = [doc_id for doc_id, _ in top]
+        marks = ",".join("?" * len(doc_ids))
+        docs = {
+            row[0]: row[1:]
+            for row in conn.execute(
+                f"SELECT doc_id, filename, snippet FROM docs WHERE doc_id IN ({marks})", doc_ids
+            )
+        }
+        term_marks = ",".join("?" * len(terms))
+        page_sets: dict[int, set[int] | None] = dict.fromkeys(doc_ids)
+        for doc_id, pages in conn.execute(
+            f"SELECT doc_id, pages FROM postings WHERE doc_id IN ({marks}) AND term IN ({term_marks})",
+            doc_ids + terms,
+        ):
+            found = {int(page_no) for page_no in pages.split(",") if page_no}
+            # Pages containing every term, like the SQL backend's per-page match.
+            page_sets[doc_id] = found if page_sets[doc_id] is None else page_sets[doc_id] & found
+        return [
+            IndexHit(
+                id=doc_id,
+                filename=docs[doc_id][0],
+                snippet=docs[doc_id][1],
+                pages=sorted(page_sets[doc_id] or ()),
+                rank=score,
+            )
+            for doc_id, score in top
+        ]
@@ -0,0 +1,194 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import ExtractionJob, ProcessingStatus
+from app.services.versions import touch_documents
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    document_id: int
+    file_path: str
+    attempts: int
+    max_attempts: int
+
+
+def build_claim_query():
+    sql = text(
+        "UPDATE extraction_jobs "
+        "SET status = 'running', attempts = attempts + 1, "
+        "locked_by = :worker_id, locked_until = :lease_until, updated_at = :now "
+        "WHERE id = ("
+        "SELECT id FROM extraction_jobs "
+        "WHERE status = 'queued' AND run_after <= :now "
+        "ORDER BY run_after, id "
+        "FOR UPDATE SKIP LOCKED "
+        "LIMIT 1"
+        ") "
+        "RETURNING id, document_id, file_path, attempts, max_attempts"
+    )
+    return sql
+
+
+def backoff_delay(attempts: int) -> float:
+    delay = settings.JOB_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return min(delay, settings.JOB_RETRY_MAX_SECONDS)
+
+
+def enqueue_job(db: AsyncSession, document_id: int, file_path: str) -> ExtractionJob:
+    job = ExtractionJob(
+        document_id=document_id,
+        file_path=file_path,
+        status="queued",
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    return job
+
+
+async def enqueue_jobs(db: AsyncSession, jobs: list[tuple[int, str]]) -> None:
+    """Insert several ``(document_id, file_path)`` jobs in one statement."""
+    if not jobs:
+        return
+    await db.execute(
+        insert(ExtractionJob),
+        [
+            {
+                "document_id": document_id,
+                "file_path": file_path,
+                "status": "queued",
+                "max_attempts": settings.JOB_MAX_ATTEMPTS,
+            }
+            for document_id, file_path in jobs
+        ],
+    )
+
+
+async def claim_job(db: AsyncSession, worker_id: str) -> ClaimedJob | None:
+    now = datetime.utcnow()
+    result = await db.execute(
+        build_claim_query(),
+        {
+            "worker_id": worker_id,
+            "now": now,
+            "lease_until": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+        },
+    )
+    row = result.fetchone()
+    await db.commit()
+    if row is None:
+        return None
+    return ClaimedJob(*row)
+
+
+def _owned(job_id: int, worker_id: str):
+    return (
+        ExtractionJob.id == job_id,
+        ExtractionJob.status == "running",
+        ExtractionJob.locked_by == worker_id,
+    )
+
+
+async def extend_lease(db: AsyncSession, job_id: int, worker_id: str) -> bool:
+    """Renew the lease; returns ``False`` if another worker has taken the job over."""
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(ExtractionJob)
+        .where(*_owned(job_id, worker_id))
+        .values(locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS))
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def complete_job(db: AsyncSession, job_id: int, worker_id: str) -> bool:
+    """Mark the job done; returns ``False`` if the lease was lost to another worker."""
+    result = await db.execute(
+        update(ExtractionJob)
+        .where(*_owned(job_id, worker_id))
+        .values(status="completed", locked_by=None, locked_until=None)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def fail_job(db: AsyncSession, job: ClaimedJob, worker_id: str, error_message: str) -> bool:
+    """Requeue the job with backoff; returns ``False`` once attempts run out.
+
+    A job whose lease was taken over is left to its new owner and counts as retrying.
+    """
+    now = datetime.utcnow()
+    if job.attempts < job.max_attempts:
+        await db.execute(
+            update(ExtractionJob)
+            .where(*_owned(job.id, worker_id))
+            .values(
+                status="queued",
+                locked_by=None,
+                locked_until=None,
+                last_error=error_message,
+                run_after=now + timedelta(seconds=backoff_delay(job.attempts)),
+            )
+        )
+        await db.commit()
+        return True
+
+    result = await db.execute(
+        update(ExtractionJob)
+        .where(*_owned(job.id, worker_id))
+        .values(status="failed", locked_by=None, locked_until=None, last_error=error_message)
+    )
+    if not result.rowcount:
+        await db.rollback()
+        return True
+    await db.execute(
+        update(ProcessingStatus)
+        .where(ProcessingStatus.document_id == job.document_id)
+        .values(status="failed", error_message=error_message, processed_at=now)
+    )
+    await touch_documents(db, [job.document_id])
+    await db.commit()
+    return False
+
+
+async def recover_stale_jobs(db: AsyncSession) -> int:
+    """Release jobs whose worker stopped renewing its lease."""
+    now = datetime.utcnow()
+    exhausted = await db.execute(
+        update(ExtractionJob)
+        .where(
+            ExtractionJob.status == "running",
+            ExtractionJob.locked_until < now,
+            ExtractionJob.attempts >= ExtractionJob.max_attempts,
+        )
+        .values(
+            status="failed",
+            locked_by=None,
+            locked_until=None,
+            last_error="Worker lease expired",
+        )
+        .returning(ExtractionJob.document_id)
+    )
+    failed_documents = [row[0] for row in exhausted.fetchall()]
+    if failed_documents:
+        await db.execute(
+            update(ProcessingStatus)
+            .where(ProcessingStatus.document_id.in_(failed_documents))
+            .values(status="failed", error_message="Worker lease expired", processed_at=now)
+        )
+        await touch_documents(db, failed_documents)
+
+    requeued = await db.execute(
+        update(ExtractionJob)
+        .where(ExtractionJob.status == "running", ExtractionJob.locked_until < now)
+        .values(status="queued", locked_by=None, locked_until=None, run_after=now)
+        .returning(ExtractionJob.id)
+    )
+    recovered = len(requeued.fetchall()) + len(failed_documents)
+    await db.commit()
+    return recovered
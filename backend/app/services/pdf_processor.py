@@ -1,15 +1,40 @@
-import fitz
+from app.services.extraction import ExtractionFailed, extraction_engine, is_memory_error
 
 
-async def extract_text_from_pdf(file_path: str) -> tuple[str, int]:
+def extract_pages(source: str | bytes) -> list[str]:
+    """Extract per-page text from a PDF path or in-memory PDF bytes."""
+    # Imported here so only extraction processes pay for loading MuPDF.
+    import fitz
+
     try:
-        doc = fitz.open(file_path)
+        if isinstance(source, bytes):
+            doc = fitz.open(stream=source, filetype="pdf")
+        else:
+            doc = fitz.open(source)
     except Exception as exc:
+        if is_memory_error(exc):
+            raise
         raise ValueError("Invalid or corrupted PDF") from exc
 
-    text_parts = []
-    for page in doc:
-        text_parts.append(page.get_text())
-    page_count = len(doc)
-    doc.close()
-    return "".join(text_parts), page_count
+    pages = []
+    try:
+        for page in doc:
+            # Postgres text cannot hold NUL characters, which some PDFs emit.
+            pages.append(page.get_text().replace("\x00", ""))
+    except Exception as exc:
+        # Allocation failures go back to the engine, which recycles the worker.
+        if is_memory_error(exc):
+            raise
+        raise ExtractionFailed(f"Could not extract text from page {len(pages) + 1}: {exc}") from exc
+    finally:
+        doc.close()
+    return pages
+
+
+async def extract_pages_from_pdf(source: str | bytes) -> list[str]:
+    return await extraction_engine.run(extract_pages, source)
+
+
+async def extract_text_from_pdf(file_path: str) -> tuple[str, int]:
+    pages = await extract_pages_from_pdf(file_path)
+    return "".join(pages), len(pages)
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Document, ExtractionJob, Tag, document_tags
+from app.services.cache import invalidate
+from app.services.documents import as_naive_utc, remove_upload
+from app.services.search_backend import remove_from_search_index
+from app.services.tags import int_array
+
+
+def build_deletion_filter(
+    document_ids: list[int] | None = None,
+    tag: str | None = None,
+    created_before: datetime | None = None,
+):
+    """Ids of documents matching every given criterion."""
+    doomed = select(Document.id)
+    if document_ids:
+        doomed = doomed.where(Document.id == int_array(document_ids))
+    if tag and tag.strip():
+        doomed = doomed.where(
+            Document.id.in_(
+                select(document_tags.c.document_id)
+                .join(Tag, Tag.id == document_tags.c.tag_id)
+                .where(Tag.name == tag.strip().lower())
+            )
+        )
+    if created_before:
+        doomed = doomed.where(Document.created_at < as_naive_utc(created_before))
+    return doomed
+
+
+def build_bulk_delete(
+    document_ids: list[int] | None = None,
+    tag: str | None = None,
+    created_before: datetime | None = None,
+    limit: int | None = None,
+    skip_locked: bool = False,
+):
+    """One ``DELETE ... RETURNING id``; pages, status, tag links and jobs go by cascade.
+
+    Each row also returns the upload paths of the document's extraction
+    jobs; the cascade runs after ``RETURNING`` is evaluated, so queued and
+    running jobs are still visible to it.
+
+    With ``limit`` the oldest matching documents are deleted first. Purge
+    batches pass ``skip_locked`` so rows another transaction holds are left
+    for the next run instead of being waited on.
+    """
+    doomed = build_deletion_filter(document_ids, tag, created_before)
+    if limit is not None:
+        doomed = doomed.order_by(Document.created_at, Document.id).limit(limit)
+    if skip_locked:
+        doomed = doomed.with_for_update(skip_locked=True)
+    return (
+        delete(Document)
+        .where(Document.id.in_(doomed))
+        .returning(
+            Document.id,
+            select(func.array_agg(ExtractionJob.file_path))
+            .where(ExtractionJob.document_id == Document.id)
+            .scalar_subquery(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def delete_documents(db: AsyncSession, statement) -> list[int]:
+    rows = (await db.execute(statement)).all()
+    await db.commit()
+    # Workers holding these jobs can no longer complete them and leave the
+    # files alone, so nothing else would remove them.
+    for _, file_paths in rows:
+        for file_path in file_paths or []:
+            remove_upload(file_path)
+    deleted = sorted(row[0] for row in rows)
+    if deleted:
+        await remove_from_search_index(deleted)
+        await invalidate()
+    return deleted
@@ -1,20 +1,311 @@
+from fastapi import HTTPException
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.schemas import SearchPage, SearchResult
+from app.services.pagination import decode_cursor, encode_cursor
+
+MAX_PAGE_HITS = 50
+# Upper bound on rows counted for ``total_estimate``; beyond it the count is a floor.
+COUNT_LIMIT = 1000
+TS_CONFIG = "english"
+# Page matches add at most a few tenths to the rank, growing with the number
+# of matching pages, so filename and tag hits still come first.
+CONTENT_RANK_WEIGHT = 0.1
+SNIPPET_CHARS = 200
+# Leading pages read for a snippet, so one document never aggregates all its text.
+SNIPPET_PAGES = 5
+
+_SNIPPET = (
+    "coalesce(("
+    f"SELECT left(string_agg(first_pages.text, '' ORDER BY first_pages.page_no), {SNIPPET_CHARS}) "
+    "FROM (SELECT document_pages.page_no, "
+    f"left(document_pages.text, {SNIPPET_CHARS}) AS text FROM document_pages "
+    "WHERE document_pages.document_id = documents.id "
+    f"ORDER BY document_pages.page_no LIMIT {SNIPPET_PAGES}) AS first_pages"
+    "), '') AS snippet, "
+)
+
+_ILIKE_MATCH = (
+    "(documents.id IN ("
+    "SELECT document_pages.document_id FROM document_pages "
+    "WHERE document_pages.text ILIKE :pattern ESCAPE '\\'"
+    ") "
+    "OR documents.filename ILIKE :pattern ESCAPE '\\' "
+    "OR documents.id IN ("
+    "SELECT document_tags.document_id FROM document_tags "
+    "JOIN tags ON tags.id = document_tags.tag_id "
+    "WHERE tags.name ILIKE :pattern ESCAPE '\\'"
+    "))"
+)
 
 
 def _escape_like(value: str) -> str:
     return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
-def build_search_query(query: str):
+def build_search_query(query: str, limit: int | None = None, after_id: int | None = None):
     pattern = f"%{_escape_like(query)}%"
-    sql = text(
-        "SELECT DISTINCT documents.id, documents.filename, "
-        "substring(coalesce(documents.content, '') from 1 for 200) AS snippet "
+    params = {"pattern": pattern, "max_page_hits": MAX_PAGE_HITS}
+    sql = (
+        "SELECT documents.id, documents.filename, "
+        f"{_SNIPPET}"
+        "ARRAY("
+        "SELECT document_pages.page_no FROM document_pages "
+        "WHERE document_pages.document_id = documents.id "
+        "AND document_pages.text ILIKE :pattern ESCAPE '\\' "
+        "ORDER BY document_pages.page_no LIMIT :max_page_hits"
+        ") AS pages "
         "FROM documents "
-        "LEFT JOIN document_tags ON documents.id = document_tags.document_id "
-        "LEFT JOIN tags ON tags.id = document_tags.tag_id "
-        "WHERE documents.content ILIKE :pattern ESCAPE '\\' "
-        "OR documents.filename ILIKE :pattern ESCAPE '\\' "
-        "OR tags.name ILIKE :pattern ESCAPE '\\'"
+        f"WHERE {_ILIKE_MATCH}"
     )
-    return sql, {"pattern": pattern}
+    if after_id is not None:
+        sql += " AND documents.id < :after_id"
+        params["after_id"] = after_id
+    sql += " ORDER BY documents.id DESC"
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+    return text(sql), params
+
+
+def build_search_count_query(query: str):
+    sql = text(
+        "SELECT count(*) FROM ("
+        f"SELECT 1 FROM documents WHERE {_ILIKE_MATCH} LIMIT :count_limit"
+        ") AS matches"
+    )
+    return sql, {"pattern": f"%{_escape_like(query)}%", "count_limit": COUNT_LIMIT}
+
+
+# Filename and tags are matched through documents.search_vector; page text
+# page by page through ix_document_pages_text_fts, so every page of a long
+# document is searchable.
+_FULLTEXT_MATCHES = (
+    "SELECT documents.id, ts_rank(documents.search_vector, "
+    f"websearch_to_tsquery('{TS_CONFIG}', :query))::float8 AS score "
+    "FROM documents "
+    f"WHERE documents.search_vector @@ websearch_to_tsquery('{TS_CONFIG}', :query) "
+    "UNION ALL "
+    "SELECT document_pages.document_id, :content_weight * ln(1 + count(*)::float8) "
+    "FROM document_pages "
+    f"WHERE to_tsvector('{TS_CONFIG}', document_pages.text) "
+    f"@@ websearch_to_tsquery('{TS_CONFIG}', :query) "
+    "GROUP BY document_pages.document_id"
+)
+
+
+def build_fulltext_query(
+    query: str,
+    limit: int,
+    after: tuple[float, int] | None = None,
+):
+    params = {
+        "query": query,
+        "limit": limit,
+        "max_page_hits": MAX_PAGE_HITS,
+        "content_weight": CONTENT_RANK_WEIGHT,
+    }
+    cursor_filter = ""
+    if after is not None:
+        cursor_filter = "WHERE (ranked.rank, ranked.id) < (:after_rank, :after_id) "
+        params["after_rank"], params["after_id"] = after
+    sql = text(
+        f"WITH matches AS ({_FULLTEXT_MATCHES}), "
+        "ranked AS (SELECT matches.id, sum(matches.score) AS rank FROM matches GROUP BY matches.id) "
+        "SELECT documents.id, documents.filename, "
+        f"{_SNIPPET}"
+        "ARRAY("
+        "SELECT document_pages.page_no FROM document_pages "
+        "WHERE document_pages.document_id = documents.id "
+        f"AND to_tsvector('{TS_CONFIG}', document_pages.text) "
+        f"@@ websearch_to_tsquery('{TS_CONFIG}', :query) "
+        "ORDER BY document_pages.page_no LIMIT :max_page_hits"
+        ") AS pages, "
+        "hits.rank "
+        "FROM ("
+        "SELECT ranked.id, ranked.rank FROM ranked "
+        f"{cursor_filter}"
+        "ORDER BY ranked.rank DESC, ranked.id DESC LIMIT :limit"
+        ") AS hits "
+        "JOIN documents ON documents.id = hits.id "
+        "ORDER BY hits.rank DESC, hits.id DESC"
+    )
+    return sql, params
+
+
+def build_fulltext_count_query(query: str):
+    sql = text(
+        "SELECT count(*) FROM ("
+        "SELECT documents.id FROM documents "
+        f"WHERE documents.search_vector @@ websearch_to_tsquery('{TS_CONFIG}', :query) "
+        "UNION "
+        "SELECT document_pages.document_id FROM document_pages "
+        f"WHERE to_tsvector('{TS_CONFIG}', document_pages.text) "
+        f"@@ websearch_to_tsquery('{TS_CONFIG}', :query) "
+        "LIMIT :count_limit"
+        ") AS matches"
+    )
+    return sql, {"query": query, "count_limit": COUNT_LIMIT}
+
+
+# Each branch is served by a GIN trigram index on its column.
+_FUZZY_MATCHES = (
+    "SELECT documents.id, word_similarity(:query, documents.filename) AS score "
+    "FROM documents WHERE :query <% documents.filename "
+    "UNION ALL "
+    "SELECT document_tags.document_id, word_similarity(:query, tags.name) "
+    "FROM tags JOIN document_tags ON document_tags.tag_id = tags.id "
+    "WHERE :query <% tags.name "
+    "UNION ALL "
+    "SELECT document_pages.document_id, word_similarity(:query, document_pages.text) "
+    "FROM document_pages WHERE :query <% document_pages.text"
+)
+
+
+def build_fuzzy_threshold_query(threshold: float):
+    """Transaction-local threshold for the ``<%`` operator."""
+    sql = text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)")
+    return sql, {"threshold": str(threshold)}
+
+
+def build_fuzzy_query(
+    query: str,
+    limit: int,
+    after: tuple[float, int] | None = None,
+):
+    """Typo-tolerant matches on filename, tag names and page text, best first."""
+    params = {"query": query, "limit": limit, "max_page_hits": MAX_PAGE_HITS}
+    cursor_filter = ""
+    if after is not None:
+        cursor_filter = "WHERE (ranked.rank, ranked.id) < (:after_rank, :after_id) "
+        params["after_rank"], params["after_id"] = after
+    sql = text(
+        f"WITH matches AS ({_FUZZY_MATCHES}), "
+        "ranked AS (SELECT matches.id, max(matches.score) AS rank FROM matches GROUP BY matches.id) "
+        "SELECT documents.id, documents.filename, "
+        f"{_SNIPPET}"
+        "ARRAY("
+        "SELECT document_pages.page_no FROM document_pages "
+        "WHERE document_pages.document_id = documents.id "
+        "AND :query <% document_pages.text "
+        "ORDER BY document_pages.page_no LIMIT :max_page_hits"
+        ") AS pages, "
+        "hits.rank "
+        "FROM ("
+        "SELECT ranked.id, ranked.rank FROM ranked "
+        f"{cursor_filter}"
+        "ORDER BY ranked.rank DESC, ranked.id DESC LIMIT :limit"
+        ") AS hits "
+        "JOIN documents ON documents.id = hits.id "
+        "ORDER BY hits.rank DESC, hits.id DESC"
+    )
+    return sql, params
+
+
+def build_fuzzy_count_query(query: str):
+    sql = text(
+        "SELECT count(*) FROM ("
+        f"SELECT DISTINCT matches.id FROM ({_FUZZY_MATCHES}) AS matches "
+        "LIMIT :count_limit"
+        ") AS distinct_matches"
+    )
+    return sql, {"query": query, "count_limit": COUNT_LIMIT}
+
+
+def build_search_vector_update():
+    """Recompute the weighted filename (A) and tag (B) search vector.
+
+    Page text is not part of it; fulltext search matches pages directly.
+    """
+    sql = text(
+        "UPDATE documents SET search_vector = "
+        f"setweight(to_tsvector('{TS_CONFIG}', "
+        "regexp_replace(coalesce(documents.filename, ''), '[_.-]+', ' ', 'g')), 'A') || "
+        f"setweight(to_tsvector('{TS_CONFIG}', coalesce(("
+        "SELECT string_agg(tags.name, ' ') FROM document_tags "
+        "JOIN tags ON tags.id = document_tags.tag_id "
+        "WHERE document_tags.document_id = documents.id"
+        "), '')), 'B') "
+        "WHERE documents.id = ANY(:document_ids)"
+    )
+    return sql
+
+
+async def refresh_search_vectors(db: AsyncSession, document_ids: list[int]) -> None:
+    if not document_ids:
+        return
+    await db.execute(build_search_vector_update(), {"document_ids": list(document_ids)})
+
+
+async def run_search(
+    db: AsyncSession,
+    query: str,
+    mode: str = "fulltext",
+    limit: int = 20,
+    cursor: str | None = None,
+) -> SearchPage:
+    after = decode_cursor(cursor) if cursor else None
+    # Fetch one extra row to learn whether another page exists.
+    if mode == "ilike":
+        sql, params = build_search_query(
+            query,
+            limit=limit + 1,
+            after_id=_cursor_int(after, "id") if after else None,
+        )
+        count_sql, count_params = build_search_count_query(query)
+    elif mode == "fuzzy":
+        await db.execute(*build_fuzzy_threshold_query(settings.SEARCH_FUZZY_THRESHOLD))
+        sql, params = build_fuzzy_query(
+            query,
+            limit + 1,
+            after=(_cursor_float(after, "rank"), _cursor_int(after, "id")) if after else None,
+        )
+        count_sql, count_params = build_fuzzy_count_query(query)
+    else:
+        sql, params = build_fulltext_query(
+            query,
+            limit + 1,
+            after=(_cursor_float(after, "rank"), _cursor_int(after, "id")) if after else None,
+        )
+        count_sql, count_params = build_fulltext_count_query(query)
+
+    result = await db.execute(sql, params)
+    rows = result.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        values = {"id": last[0]}
+        if mode != "ilike":
+            values["rank"] = last[4]
+        next_cursor = encode_cursor(values)
+
+    total_estimate = None
+    if after is None:
+        total_estimate = await db.scalar(count_sql, count_params)
+
+    return SearchPage(
+        items=[
+            SearchResult(id=row[0], filename=row[1], snippet=row[2] or "", pages=row[3] or [])
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+        total_estimate=total_estimate,
+    )
+
+
+def _cursor_int(values: dict, key: str) -> int:
+    value = values.get(key)
+    if not isinstance(value, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+
+def _cursor_float(values: dict, key: str) -> float:
+    value = values.get(key)
+    if not isinstance(value, (int, float)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return float(value)
@@ -0,0 +1,219 @@
+"""Pluggable search backends behind ``/search``.
+
+``SqlSearchBackend`` queries Postgres directly. ``InvertedIndexBackend``
+answers from an embedded BM25 index and needs no database at query time;
+write paths keep it current through ``sync_search_index`` and
+``remove_from_search_index``, and ``python -m app.reindex`` rebuilds it.
+The backend is chosen with ``SEARCH_BACKEND``; ``set_search_backend``
+swaps it at runtime (tests, benchmarks).
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Document, DocumentPage, Tag, document_tags
+from app.schemas import SearchPage, SearchResult
+from app.services.inverted_index import IndexDocument, IndexMetadata, InvertedIndex
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.search import _cursor_float, _cursor_int, run_search
+
+logger = logging.getLogger(__name__)
+
+# Documents loaded from Postgres per inverted-index write.
+INDEX_BATCH_SIZE = 100
+
+
+async def load_index_documents(
+    db: AsyncSession,
+    document_ids: list[int],
+) -> list[IndexDocument]:
+    """Index input for the documents that still exist."""
+    metadata = await load_index_metadata(db, document_ids)
+    pages: dict[int, list[str]] = defaultdict(list)
+    page_rows = await db.execute(
+        select(DocumentPage.document_id, DocumentPage.text)
+        .where(DocumentPage.document_id.in_(document_ids))
+        .order_by(DocumentPage.document_id, DocumentPage.page_no)
+    )
+    for document_id, page_text in page_rows:
+        pages[document_id].append(page_text or "")
+    return [IndexDocument(*document, pages[document.id]) for document in metadata]
+
+
+async def load_index_metadata(db: AsyncSession, document_ids: list[int]) -> list[IndexMetadata]:
+    """Filename and tags of the documents that still exist, without page text."""
+    documents = await db.execute(
+        select(Document.id, Document.version, Document.filename).where(
+            Document.id.in_(document_ids)
+        )
+    )
+    tags: dict[int, list[str]] = defaultdict(list)
+    tag_rows = await db.execute(
+        select(document_tags.c.document_id, Tag.name)
+        .join(Tag, Tag.id == document_tags.c.tag_id)
+        .where(document_tags.c.document_id.in_(document_ids))
+        .order_by(document_tags.c.document_id, Tag.name)
+    )
+    for document_id, name in tag_rows:
+        tags[document_id].append(name)
+    return [
+        IndexMetadata(document_id, version, filename, tags[document_id])
+        for document_id, version, filename in documents
+    ]
+
+
+class SearchBackend(ABC):
+    """Interface for ``/search`` and the write-path hooks that feed it."""
+
+    modes: tuple[str, ...] = ()
+
+    @abstractmethod
+    async def search(
+        self,
+        db: AsyncSession,
+        query: str,
+        mode: str = "fulltext",
+        limit: int = 20,
+        cursor: str | None = None,
+    ) -> SearchPage:
+        """One page of results for ``query``."""
+
+    async def index_documents(self, db: AsyncSession, document_ids: list[int]) -> None:
+        """Re-read documents from Postgres after their text, filename or tags changed."""
+
+    async def index_metadata(self, db: AsyncSession, document_ids: list[int]) -> None:
+        """Re-read documents whose filename or tags changed but whose text did not."""
+        await self.index_documents(db, document_ids)
+
+    async def remove_documents(self, document_ids: list[int]) -> None:
+        """Forget deleted documents."""
+
+
+class SqlSearchBackend(SearchBackend):
+    """Search straight from Postgres; ``search_vector`` is maintained by the write paths."""
+
+    modes = ("fulltext", "ilike", "fuzzy")
+
+    async def search(self, db, query, mode="fulltext", limit=20, cursor=None) -> SearchPage:
+        return await run_search(db, query, mode=mode, limit=limit, cursor=cursor)
+
+
+class InvertedIndexBackend(SearchBackend):
+    modes = ("fulltext",)
+
+    def __init__(self, index: InvertedIndex):
+        self.index = index
+
+    async def search(self, db, query, mode="fulltext", limit=20, cursor=None) -> SearchPage:
+        if mode not in self.modes:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Search mode '{mode}' is not supported by the inverted index backend",
+            )
+        after = None
+        if cursor:
+            values = decode_cursor(cursor)
+            after = (_cursor_float(values, "rank"), _cursor_int(values, "id"))
+
+        # Fetch one extra hit to learn whether another page exists.
+        hits, total = await asyncio.to_thread(self.index.search, query, limit + 1, after)
+        next_cursor = None
+        if len(hits) > limit:
+            hits = hits[:limit]
+            next_cursor = encode_cursor({"id": hits[-1].id, "rank": hits[-1].rank})
+        return SearchPage(
+            items=[
+                SearchResult(id=hit.id, filename=hit.filename, snippet=hit.snippet, pages=hit.pages)
+                for hit in hits
+            ],
+            next_cursor=next_cursor,
+            total_estimate=total if after is None else None,
+        )
+
+    async def index_documents(self, db: AsyncSession, document_ids: list[int]) -> None:
+        document_ids = sorted(set(document_ids))
+        # Batches bound how much page text is held in memory at once.
+        for start in range(0, len(document_ids), INDEX_BATCH_SIZE):
+            batch = document_ids[start : start + INDEX_BATCH_SIZE]
+            documents = await load_index_documents(db, batch)
+            await asyncio.to_thread(self.index.replace_documents, documents)
+            missing = set(batch) - {document.id for document in documents}
+            if missing:
+                await self.remove_documents(sorted(missing))
+
+    async def index_metadata(self, db: AsyncSession, document_ids: list[int]) -> None:
+        document_ids = sorted(set(document_ids))
+        for start in range(0, len(document_ids), INDEX_BATCH_SIZE):
+            batch = document_ids[start : start + INDEX_BATCH_SIZE]
+            documents = await load_index_metadata(db, batch)
+            unindexed = await asyncio.to_thread(self.index.update_metadata, documents)
+            if unindexed:
+                await self.index_documents(db, unindexed)
+            missing = set(batch) - {document.id for document in documents}
+            if missing:
+                await self.remove_documents(sorted(missing))
+
+    async def remove_documents(self, document_ids: list[int]) -> None:
+        await asyncio.to_thread(self.index.delete_documents, list(document_ids))
+
+
+def _default_backend() -> SearchBackend:
+    if settings.SEARCH_BACKEND == "inverted":
+        return InvertedIndexBackend(InvertedIndex(settings.SEARCH_INDEX_PATH))
+    return SqlSearchBackend()
+
+
+_backend: SearchBackend | None = None
+
+
+def get_search_backend() -> SearchBackend:
+    # Created on first use so importing this module never touches the index file.
+    global _backend
+    if _backend is None:
+        _backend = _default_backend()
+    return _backend
+
+
+def set_search_backend(backend: SearchBackend) -> None:
+    global _backend
+    _backend = backend
+
+
+async def sync_search_index(db: AsyncSession, document_ids: list[int]) -> None:
+    """Push committed document changes to the search backend.
+
+    Failures are logged rather than raised: the change is already committed
+    in Postgres, and ``python -m app.reindex`` repairs a stale index.
+    """
+    if not document_ids:
+        return
+    try:
+        await get_search_backend().index_documents(db, list(document_ids))
+    except Exception:
+        logger.exception("Could not update the search index for documents %s", document_ids)
+
+
+async def sync_search_metadata(db: AsyncSession, document_ids: list[int]) -> None:
+    """Like ``sync_search_index`` for changes that leave page text untouched (tags)."""
+    if not document_ids:
+        return
+    try:
+        await get_search_backend().index_metadata(db, list(document_ids))
+    except Exception:
+        logger.exception("Could not update the search index for documents %s", document_ids)
+
+
+async def remove_from_search_index(document_ids: list[int]) -> None:
+    if not document_ids:
+        return
+    try:
+        await get_search_backend().remove_documents(list(document_ids))
+    except Exception:
+        logger.exception("Could not remove documents %s from the search index", document_ids)
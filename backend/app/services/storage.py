@@ -1,4 +1,9 @@
+import asyncio
+import hashlib
+import io
 import os
+import shutil
+from typing import NamedTuple
 from uuid import uuid4
 
 from fastapi import HTTPException, UploadFile
@@ -8,6 +13,17 @@ ALLOWED_CONTENT_TYPES = {"application/pdf"}
 ALLOWED_EXTENSIONS = {".pdf"}
 
 
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class StoredUpload(NamedTuple):
+    file_path: str | None
+    file_size: int
+    original_name: str
+    content_hash: str
+    data: bytes | None = None
+
+
 def sanitize_filename(filename: str | None) -> str:
     if not filename:
         return "upload.pdf"
@@ -24,12 +40,85 @@ def _validate_upload(file: UploadFile) -> str:
     return original_name
 
 
+def _copy_file(source, output) -> None:
+    """Copy an open file into ``output``, kernel-side when both have descriptors."""
+    if getattr(source, "_rolled", True) is False:
+        # A SpooledTemporaryFile still in memory would be written to a temp
+        # file by fileno(); write its buffer directly instead.
+        output.write(source._file.getbuffer())
+        return
+    try:
+        source_fd = source.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        shutil.copyfileobj(source, output, COPY_CHUNK_SIZE)
+        return
+
+    source.flush()
+    size = os.fstat(source_fd).st_size
+    offset = 0
+    try:
+        while offset < size:
+            # copy_file_range never moves the data through userspace and can
+            # share extents on reflink-capable filesystems.
+            copied = os.copy_file_range(source_fd, output.fileno(), size - offset, offset)
+            if copied == 0:
+                break
+            offset += copied
+    except OSError:
+        output.seek(0)
+        output.truncate()
+        source.seek(0)
+        shutil.copyfileobj(source, output, COPY_CHUNK_SIZE)
+
+
+def _persist(
+    source,
+    file_path: str,
+    max_bytes: int,
+    inline_max_bytes: int,
+    chunk_size: int,
+) -> tuple[int, str, bytes | None]:
+    """Runs in a worker thread: size-check, hash and persist the spooled upload."""
+    source.seek(0, os.SEEK_END)
+    size = source.tell()
+    if size > max_bytes:
+        raise HTTPException(status_code=413, detail="File too large")
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Empty file upload")
+    source.seek(0)
+
+    if size <= inline_max_bytes:
+        data = source.read()
+        return size, hashlib.sha256(data).hexdigest(), data
+
+    # Hashing still reads every byte into Python once; only the copy into
+    # ``upload_dir`` below stays in the kernel.
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: source.read(chunk_size), b""):
+        digest.update(chunk)
+    try:
+        with open(file_path, "wb") as output:
+            _copy_file(source, output)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return size, digest.hexdigest(), None
+
+
 async def save_upload(
     file: UploadFile,
     upload_dir: str,
     max_bytes: int,
     chunk_size: int = 1024 * 1024,
-) -> tuple[str, int, str]:
+    inline_max_bytes: int = 0,
+) -> StoredUpload:
+    """Persist an upload Starlette has already spooled.
+
+    Files no larger than ``inline_max_bytes`` are kept in memory and never
+    written to ``upload_dir``; ``file_path`` is then ``None`` and the bytes
+    are returned in ``data``.
+    """
     original_name = _validate_upload(file)
     os.makedirs(upload_dir, exist_ok=True)
 
@@ -37,27 +126,13 @@ async def save_upload(
     stored_name = f"{uuid4().hex}{ext}"
     file_path = os.path.join(upload_dir, stored_name)
 
-    size = 0
     try:
-        with open(file_path, "wb") as output:
-            while True:
-                chunk = await file.read(chunk_size)
-                if not chunk:
-                    break
-                size += len(chunk)
-                if size > max_bytes:
-                    raise HTTPException(status_code=413, detail="File too large")
-                output.write(chunk)
-    except HTTPException:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        raise
+        size, content_hash, data = await asyncio.to_thread(
+            _persist, file.file, file_path, max_bytes, inline_max_bytes, chunk_size
+        )
     finally:
         await file.close()
 
-    if size == 0:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        raise HTTPException(status_code=400, detail="Empty file upload")
-
-    return file_path, size, original_name
+    if data is not None:
+        return StoredUpload(None, size, original_name, content_hash, data)
+    return StoredUpload(file_path, size, original_name, content_hash)
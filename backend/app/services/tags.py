@@ -0,0 +1,138 @@
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, String, any_, delete, literal, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Document, Tag, document_tags
+from app.schemas import BulkTagResponse
+from app.services.cache import invalidate
+from app.services.search import _escape_like, refresh_search_vectors
+from app.services.search_backend import sync_search_metadata
+from app.services.versions import touch_documents
+
+MAX_TAG_NAME_LENGTH = 100
+
+
+def normalize_tag_names(names: list[str]) -> list[str]:
+    """Strip, lowercase and de-duplicate tag names, preserving order."""
+    normalized = []
+    for name in names:
+        tag_name = name.strip().lower()
+        if not tag_name:
+            raise HTTPException(status_code=400, detail="Tag name is required")
+        if len(tag_name) > MAX_TAG_NAME_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tag names are limited to {MAX_TAG_NAME_LENGTH} characters",
+            )
+        if tag_name not in normalized:
+            normalized.append(tag_name)
+    return normalized
+
+
+def build_tag_list_query(prefix: str | None = None, limit: int | None = None, order: str = "name"):
+    """Tags by name or usage; a prefix filter is served by ``ix_tags_name_pattern``."""
+    query = select(Tag)
+    if prefix and prefix.strip():
+        # Plain LIKE with a literal prefix (default backslash escape) so the
+        # text_pattern_ops index can turn it into a range scan.
+        query = query.where(Tag.name.like(_escape_like(prefix.strip().lower()) + "%"))
+    if order == "count":
+        query = query.order_by(Tag.document_count.desc(), Tag.name)
+    else:
+        query = query.order_by(Tag.name)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def int_array(values: list[int]):
+    # One array parameter instead of one bind per id keeps large requests under
+    # the driver's parameter limit.
+    return any_(literal(list(values), ARRAY(Integer)))
+
+
+def _text_array(values: list[str]):
+    return any_(literal(list(values), ARRAY(String)))
+
+
+def build_tag_upsert(names: list[str]):
+    now = datetime.utcnow()
+    return (
+        pg_insert(Tag)
+        .values([{"name": name, "created_at": now} for name in names])
+        .on_conflict_do_nothing(index_elements=[Tag.name])
+    )
+
+
+def build_link_insert(document_ids: list[int], names: list[str]):
+    return (
+        pg_insert(document_tags)
+        .from_select(
+            ["document_id", "tag_id"],
+            select(Document.id, Tag.id)
+            .join(Tag, true())
+            .where(
+                Document.id == int_array(document_ids),
+                Tag.name == _text_array(names),
+            ),
+        )
+        .on_conflict_do_nothing()
+        .returning(document_tags.c.document_id)
+    )
+
+
+def build_link_delete(document_ids: list[int], names: list[str]):
+    return (
+        delete(document_tags)
+        .where(
+            document_tags.c.document_id == int_array(document_ids),
+            document_tags.c.tag_id.in_(select(Tag.id).where(Tag.name == _text_array(names))),
+        )
+        .returning(document_tags.c.document_id)
+    )
+
+
+async def apply_bulk_tags(
+    db: AsyncSession,
+    document_ids: list[int],
+    add: list[str],
+    remove: list[str],
+) -> BulkTagResponse:
+    """Add and remove tags across many documents in one transaction."""
+    document_ids = list(dict.fromkeys(document_ids))
+    add = normalize_tag_names(add)
+    remove = normalize_tag_names(remove)
+    if set(add) & set(remove):
+        raise HTTPException(status_code=400, detail="A tag cannot be both added and removed")
+
+    existing = await db.execute(select(Document.id).where(Document.id == int_array(document_ids)))
+    existing_ids = set(existing.scalars().all())
+
+    added: list[int] = []
+    removed: list[int] = []
+    if existing_ids and add:
+        await db.execute(build_tag_upsert(add))
+        result = await db.execute(build_link_insert(document_ids, add))
+        added = result.scalars().all()
+    if existing_ids and remove:
+        result = await db.execute(build_link_delete(document_ids, remove))
+        removed = result.scalars().all()
+
+    changed = sorted(set(added) | set(removed))
+    await refresh_search_vectors(db, changed)
+    await touch_documents(db, changed)
+    await db.commit()
+    await sync_search_metadata(db, changed)
+    if existing_ids:
+        await invalidate()
+
+    return BulkTagResponse(
+        added=len(added),
+        removed=len(removed),
+        missing_document_ids=[
+            document_id for document_id in document_ids if document_id not in existing_ids
+        ],
+    )
@@ -0,0 +1,230 @@
+"""Resumable upload sessions.
+
+A session is a ``<id>.json`` metadata file plus a ``<id>.part`` staging
+file under ``UPLOAD_DIR/sessions``. The staging file's size is the
+authoritative offset, so any API process sharing ``UPLOAD_DIR`` can
+accept the next chunk.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import re
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.schemas import UploadSessionResponse
+from app.services.storage import ALLOWED_EXTENSIONS, StoredUpload, sanitize_filename
+
+SESSIONS_DIRNAME = "sessions"
+# Abandoned sessions are swept at most this often per process.
+SWEEP_INTERVAL_SECONDS = 60.0
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_last_sweep = float("-inf")
+
+
+def _sessions_dir() -> str:
+    return os.path.join(settings.UPLOAD_DIR, SESSIONS_DIRNAME)
+
+
+def _paths(upload_id: str) -> tuple[str, str]:
+    if not _SESSION_ID.match(upload_id):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    base = os.path.join(_sessions_dir(), upload_id)
+    return f"{base}.json", f"{base}.part"
+
+
+def _expires_at(part_path: str) -> datetime:
+    last_activity = datetime.utcfromtimestamp(os.path.getmtime(part_path))
+    return last_activity + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+
+def _load(upload_id: str) -> tuple[dict, str]:
+    meta_path, part_path = _paths(upload_id)
+    try:
+        with open(meta_path, encoding="utf-8") as handle:
+            meta = json.load(handle)
+        if _expires_at(part_path) <= datetime.utcnow():
+            raise FileNotFoundError(part_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload session not found") from None
+    return meta, part_path
+
+
+def _response(meta: dict, part_path: str) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        id=meta["id"],
+        filename=meta["filename"],
+        size=meta["size"],
+        offset=os.path.getsize(part_path),
+        expires_at=_expires_at(part_path),
+    )
+
+
+@contextmanager
+def _locked(part_path: str):
+    """Exclusive, non-blocking lock so one request at a time owns a session."""
+    with open(part_path, "r+b") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise HTTPException(status_code=409, detail="Upload session is busy") from None
+        try:
+            yield handle
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def create_session(filename: str, size: int) -> UploadSessionResponse:
+    original_name = sanitize_filename(filename)
+    if os.path.splitext(original_name)[1].lower() not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="Empty file upload")
+    if size > settings.MAX_RESUMABLE_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    sweep_expired_sessions()
+    os.makedirs(_sessions_dir(), exist_ok=True)
+    upload_id = uuid4().hex
+    meta_path, part_path = _paths(upload_id)
+    meta = {"id": upload_id, "filename": original_name, "size": size}
+    open(part_path, "wb").close()
+    with open(meta_path, "w", encoding="utf-8") as handle:
+        json.dump(meta, handle)
+    return _response(meta, part_path)
+
+
+def get_session(upload_id: str) -> UploadSessionResponse:
+    meta, part_path = _load(upload_id)
+    return _response(meta, part_path)
+
+
+async def append_chunk(upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> UploadSessionResponse:
+    """Append a request body at ``offset``, which must equal the bytes stored so far."""
+    meta, part_path = _load(upload_id)
+    with _locked(part_path) as handle:
+        current = os.fstat(handle.fileno()).st_size
+        if offset != current:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Offset mismatch; upload is at byte {current}",
+                headers={"Upload-Offset": str(current)},
+            )
+
+        handle.seek(current)
+        received = 0
+        try:
+            async for chunk in chunks:
+                received += len(chunk)
+                if received > settings.UPLOAD_CHUNK_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Chunk too large")
+                if current + received > meta["size"]:
+                    raise HTTPException(status_code=413, detail="Chunk exceeds declared upload size")
+                await asyncio.to_thread(handle.write, chunk)
+        except HTTPException:
+            # Rejected chunks are discarded whole; the client retries from ``offset``.
+            await asyncio.to_thread(handle.truncate, current)
+            raise
+        finally:
+            # Bytes written before a dropped connection are kept so the client can resume.
+            await asyncio.to_thread(_sync, handle)
+    return _response(meta, part_path)
+
+
+def _sync(handle) -> None:
+    handle.flush()
+    os.fsync(handle.fileno())
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@asynccontextmanager
+async def finalize_session(upload_id: str) -> AsyncIterator[StoredUpload]:
+    """Move a fully received upload into ``UPLOAD_DIR`` for the duration of the block.
+
+    The session ends only when the block succeeds. If it raises (say the
+    document insert fails), the file goes back to staging so the client can
+    retry ``/complete``. Meanwhile the session reads as not found, so
+    concurrent chunks or completions are turned away.
+    """
+    meta, part_path = _load(upload_id)
+    meta_path, _ = _paths(upload_id)
+    with _locked(part_path):
+        size = os.path.getsize(part_path)
+        if size != meta["size"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incomplete; received {size} of {meta['size']} bytes",
+                headers={"Upload-Offset": str(size)},
+            )
+        content_hash = await asyncio.to_thread(_hash_file, part_path)
+        ext = os.path.splitext(meta["filename"])[1].lower()
+        file_path = os.path.join(settings.UPLOAD_DIR, f"{uuid4().hex}{ext}")
+        os.replace(part_path, file_path)
+        # Keeps the sweep, which falls back to the metadata's mtime, away.
+        os.utime(meta_path)
+
+    try:
+        yield StoredUpload(file_path, size, meta["filename"], content_hash)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.replace(file_path, part_path)
+        raise
+    os.remove(meta_path)
+
+
+def abort_session(upload_id: str) -> None:
+    meta_path, part_path = _paths(upload_id)
+    if not os.path.exists(meta_path):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    for path in (meta_path, part_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def sweep_expired_sessions(force: bool = False) -> int:
+    """Delete sessions idle for longer than ``UPLOAD_SESSION_TTL_SECONDS``."""
+    global _last_sweep
+
+    now = time.monotonic()
+    if not force and now - _last_sweep < SWEEP_INTERVAL_SECONDS:
+        return 0
+    _last_sweep = now
+
+    sessions_dir = _sessions_dir()
+    if not os.path.isdir(sessions_dir):
+        return 0
+    cutoff = time.time() - settings.UPLOAD_SESSION_TTL_SECONDS
+    removed = 0
+    for name in os.listdir(sessions_dir):
+        upload_id, ext = os.path.splitext(name)
+        if ext != ".json":
+            continue
+        meta_path = os.path.join(sessions_dir, name)
+        part_path = os.path.join(sessions_dir, f"{upload_id}.part")
+        try:
+            last_activity = os.path.getmtime(part_path)
+        except FileNotFoundError:
+            last_activity = os.path.getmtime(meta_path)
+        if last_activity < cutoff:
+            for path in (meta_path, part_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            removed += 1
+    return removed
@@ -0,0 +1,41 @@
+import hashlib
+import json
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Document
+
+
+async def touch_documents(db: AsyncSession, document_ids: list[int]) -> None:
+    """Bump ``version``/``updated_at`` after content, status or tag changes."""
+    if not document_ids:
+        return
+    await db.execute(
+        update(Document)
+        .where(Document.id.in_(list(document_ids)))
+        .values(version=Document.version + 1, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def document_etag(document_id: int, version: int, include_content: bool = True) -> str:
+    suffix = "" if include_content else "-meta"
+    return f'"doc-{document_id}-v{version}{suffix}"'
+
+
+def list_etag(rows: list[tuple[int, int]], next_cursor: str | None) -> str:
+    """Strong ETag for a list page, derived from each row's ``(id, version)``."""
+    digest = hashlib.sha256(json.dumps([rows, next_cursor]).encode("utf-8")).hexdigest()
+    return f'"list-{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so a W/ prefix still matches.
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
@@ -0,0 +1,173 @@
+"""Standalone extraction worker.
+
+Usage:
+    python -m app.worker [--concurrency N] [--metrics-port PORT]
+
+Consumes jobs from the ``extraction_jobs`` table. Any number of worker
+processes can run against the same database; jobs are claimed with
+``FOR UPDATE SKIP LOCKED`` so each one is handled by a single consumer.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+
+from prometheus_client import start_http_server
+
+from app.config import settings
+from app.database import async_session, engine
+from app.metrics import instrument_engine
+from app.migrations import check_schema_version
+from app.services.documents import _parse_document_with_session, remove_upload
+from app.services.extraction import extraction_engine
+from app.services.jobs import (
+    ClaimedJob,
+    claim_job,
+    complete_job,
+    extend_lease,
+    fail_job,
+    recover_stale_jobs,
+)
+
+logger = logging.getLogger("app.worker")
+
+
+async def _wait(stop: asyncio.Event, seconds: float) -> None:
+    try:
+        await asyncio.wait_for(stop.wait(), timeout=seconds)
+    except TimeoutError:
+        pass
+
+
+async def _heartbeat(job_id: int, worker_id: str) -> None:
+    """Renew the job's lease; returns once the lease is lost or about to expire unrenewed."""
+    interval = settings.JOB_LEASE_SECONDS / 3
+    renewed_at = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with async_session() as db:
+                if not await extend_lease(db, job_id, worker_id):
+                    logger.error("Lease on job %s was taken over by another worker", job_id)
+                    return
+            renewed_at = time.monotonic()
+        except Exception:
+            logger.exception("Could not renew the lease on job %s", job_id)
+            if time.monotonic() + interval - renewed_at >= settings.JOB_LEASE_SECONDS:
+                logger.error("Lease on job %s expires before the next renewal", job_id)
+                return
+
+
+async def _extract(job: ClaimedJob) -> None:
+    async with async_session() as db:
+        await _parse_document_with_session(job.document_id, job.file_path, db, raise_retryable=True)
+
+
+async def _run_job(job: ClaimedJob, worker_id: str) -> None:
+    extraction = asyncio.create_task(_extract(job))
+    heartbeat = asyncio.create_task(_heartbeat(job.id, worker_id))
+    try:
+        await asyncio.wait({extraction, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        extraction.cancel()
+        raise
+    finally:
+        heartbeat.cancel()
+    if not extraction.done():
+        # Without a lease another worker may run the job; leave it and its upload alone.
+        extraction.cancel()
+        await asyncio.gather(extraction, return_exceptions=True)
+        logger.error("Abandoned job %s after losing its lease", job.id)
+        return
+
+    exc = extraction.exception()
+    if exc is not None:
+        logger.error("Job %s failed on attempt %s", job.id, job.attempts, exc_info=exc)
+        async with async_session() as db:
+            retrying = await fail_job(db, job, worker_id, str(exc) or exc.__class__.__name__)
+        if not retrying:
+            remove_upload(job.file_path)
+        return
+
+    async with async_session() as db:
+        completed = await complete_job(db, job.id, worker_id)
+    if completed:
+        remove_upload(job.file_path)
+
+
+async def _consume(worker_id: str, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            async with async_session() as db:
+                job = await claim_job(db, worker_id)
+        except Exception:
+            logger.exception("Could not claim a job")
+            await _wait(stop, settings.WORKER_POLL_SECONDS)
+            continue
+        if job is None:
+            await _wait(stop, settings.WORKER_POLL_SECONDS)
+            continue
+        await _run_job(job, worker_id)
+
+
+async def _recover(stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            async with async_session() as db:
+                recovered = await recover_stale_jobs(db)
+        except Exception:
+            logger.exception("Could not recover stale jobs")
+            recovered = 0
+        if recovered:
+            logger.warning("Recovered %s jobs with expired leases", recovered)
+        await _wait(stop, settings.JOB_LEASE_SECONDS)
+
+
+async def run_worker(concurrency: int) -> None:
+    await check_schema_version(engine)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("Starting %s consumers as %s", concurrency, worker_prefix)
+    tasks = [asyncio.create_task(_recover(stop))]
+    tasks.extend(
+        asyncio.create_task(_consume(f"{worker_prefix}:{index}", stop))
+        for index in range(concurrency)
+    )
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        extraction_engine.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run DocProc extraction workers")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.WORKER_CONCURRENCY,
+        help="number of jobs processed concurrently",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="serve Prometheus metrics for this worker on the given port",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.metrics_port:
+        instrument_engine(engine)
+        start_http_server(args.metrics_port)
+    asyncio.run(run_worker(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""Service-layer microbenchmarks.
+
+Usage (from ``backend/``):
+    pip install -r ../scripts/requirements.txt
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --database-url postgresql+asyncpg://... --db-sizes 1000,10000
+    python -m benchmarks.run --compare baseline.json
+
+Synthetic PDFs are produced with ``create_pdf`` from ``scripts/seed_data.py``.
+The search benchmarks seed their own corpus and refuse to run against a
+database that already holds documents; the inverted index benchmarks use
+a temporary index file and need no database.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "scripts"))
+
+CHUNK_SIZES = [64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+SEARCH_TERMS = ["alpha", "zeta", "alpha beta", "nomatchterm"]
+# Lines create_pdf fits on a letter page at its fixed 0.3" spacing (fewer under the title).
+FIRST_PAGE_LINES = 28
+LINES_PER_PAGE = 30
+
+
+def _parse_ints(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def _stats(samples: list[float]) -> dict:
+    return {
+        "runs": len(samples),
+        "mean_s": statistics.fmean(samples),
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+    }
+
+
+async def _time_async(func, repeat: int, warmup: int = 1) -> list[float]:
+    for _ in range(warmup):
+        await func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _make_pdf(pages: int) -> str:
+    sys.path.insert(0, SCRIPTS_DIR)
+    from seed_data import create_pdf
+
+    line_count = FIRST_PAGE_LINES + LINES_PER_PAGE * (pages - 1)
+    lines = [f"Line {index} of a synthetic benchmark document." for index in range(line_count)]
+    return create_pdf(f"bench_{pages}_pages.pdf", f"Benchmark {pages} pages", lines)
+
+
+async def bench_extraction(page_counts: list[int], repeat: int) -> list[dict]:
+    from app.services.extraction import extraction_engine
+    from app.services.pdf_processor import extract_text_from_pdf
+
+    results = []
+    try:
+        for pages in page_counts:
+            path = _make_pdf(pages)
+            try:
+                _, actual_pages = await extract_text_from_pdf(path)
+                samples = await _time_async(lambda: extract_text_from_pdf(path), repeat)
+            finally:
+                os.remove(path)
+            stats = _stats(samples)
+            stats["pages_per_s"] = actual_pages / stats["median_s"]
+            results.append(
+                {
+                    "name": "extract_text_from_pdf",
+                    "params": {"pages": actual_pages},
+                    "stats": stats,
+                }
+            )
+    finally:
+        extraction_engine.shutdown()
+    return results
+
+
+async def bench_save_upload(size_mb: int, repeat: int) -> list[dict]:
+    from starlette.datastructures import Headers, UploadFile
+
+    from app.services.storage import save_upload
+
+    payload = os.urandom(size_mb * 1024 * 1024)
+    results = []
+    with tempfile.TemporaryDirectory() as upload_dir:
+        for chunk_size in CHUNK_SIZES:
+            async def run():
+                upload = UploadFile(
+                    filename="bench.pdf",
+                    file=io.BytesIO(payload),
+                    headers=Headers({"content-type": "application/pdf"}),
+                )
+                stored = await save_upload(upload, upload_dir, len(payload), chunk_size=chunk_size)
+                os.remove(stored.file_path)
+
+            stats = _stats(await _time_async(run, repeat))
+            stats["mb_per_s"] = size_mb / stats["median_s"]
+            results.append(
+                {
+                    "name": "save_upload",
+                    "params": {"size_mb": size_mb, "chunk_size": chunk_size},
+                    "stats": stats,
+                }
+            )
+    return results
+
+
+def _synthetic_pages(rng: random.Random, vocabulary: list[str], pages: int, words: int) -> list[str]:
+    return [" ".join(rng.choices(vocabulary, k=words)) + "\n" for _ in range(pages)]
+
+
+def _vocabulary(rng: random.Random) -> list[str]:
+    return ["alpha", "beta", "gamma", "delta", "zeta"] + [
+        "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 10)))
+        for _ in range(5000)
+    ]
+
+
+async def _seed(target: int, current: int, rng: random.Random, args) -> None:
+    from app.ingest import IngestResult, write_batch
+
+    vocabulary = _vocabulary(rng)
+    batch = []
+    for index in range(current, target):
+        pages = _synthetic_pages(rng, vocabulary, args.pages_per_doc, args.words_per_page)
+        batch.append(IngestResult(f"synthetic_{index}.pdf", 0, f"{index:064x}", pages, None))
+        if len(batch) >= 1000:
+            await write_batch(batch)
+            batch = []
+    if batch:
+        await write_batch(batch)
+
+
+async def bench_search(sizes: list[int], repeat: int, args) -> list[dict]:
+    from sqlalchemy import text
+
+    from app.database import async_session, engine
+    from app.migrations import migrate
+    from app.services.search import build_fulltext_query, build_search_query
+
+    await migrate(engine)
+    async with async_session() as db:
+        existing = await db.scalar(text("SELECT count(*) FROM documents"))
+    if existing:
+        raise SystemExit("Benchmark database must start empty; refusing to touch existing documents")
+
+    rng = random.Random(args.seed)
+    results = []
+    seeded = 0
+    try:
+        for size in sorted(sizes):
+            await _seed(size, seeded, rng, args)
+            seeded = size
+            async with engine.begin() as conn:
+                await conn.execute(text("ANALYZE"))
+
+            for mode, builder in (
+                ("ilike", lambda term: build_search_query(term, limit=21)),
+                ("fulltext", lambda term: build_fulltext_query(term, 21)),
+            ):
+                for term in SEARCH_TERMS:
+                    sql, params = builder(term)
+
+                    async def run():
+                        async with async_session() as db:
+                            (await db.execute(sql, params)).fetchall()
+
+                    results.append(
+                        {
+                            "name": "search_query",
+                            "params": {"mode": mode, "term": term, "documents": size},
+                            "stats": _stats(await _time_async(run, repeat)),
+                        }
+                    )
+    finally:
+        if not args.keep_data:
+            async with engine.begin() as conn:
+                await conn.execute(text("TRUNCATE documents, tags RESTART IDENTITY CASCADE"))
+        await engine.dispose()
+    return results
+
+
+async def bench_inverted_index(sizes: list[int], repeat: int, args) -> list[dict]:
+    from app.services.inverted_index import IndexDocument, InvertedIndex
+
+    rng = random.Random(args.seed)
+    vocabulary = _vocabulary(rng)
+    results = []
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = InvertedIndex(os.path.join(index_dir, "index.sqlite3"))
+        seeded = 0
+        for size in sorted(sizes):
+            started = time.perf_counter()
+            for start in range(seeded, size, 1000):
+                index.replace_documents(
+                    [
+                        IndexDocument(
+                            index_id,
+                            1,
+                            f"synthetic_{index_id}.pdf",
+                            [],
+                            _synthetic_pages(rng, vocabulary, args.pages_per_doc, args.words_per_page),
+                        )
+                        for index_id in range(start, min(start + 1000, size))
+                    ]
+                )
+            if size > seeded:
+                results.append(
+                    {
+                        "name": "inverted_index_write",
+                        "params": {"documents": size - seeded, "pages_per_doc": args.pages_per_doc},
+                        "stats": _stats([time.perf_counter() - started]),
+                    }
+                )
+            seeded = size
+
+            for term in SEARCH_TERMS:
+                async def run():
+                    index.search(term, 21)
+
+                results.append(
+                    {
+                        "name": "inverted_index_search",
+                        "params": {"term": term, "documents": size},
+                        "stats": _stats(await _time_async(run, repeat)),
+                    }
+                )
+    return results
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _key(result: dict) -> str:
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(baseline_path: str, current: dict, threshold: float) -> int:
+    """Print median ratios against a baseline; return the number of regressions."""
+    with open(baseline_path, encoding="utf-8") as handle:
+        baseline = {_key(result): result for result in json.load(handle)["results"]}
+
+    regressions = 0
+    for result in current["results"]:
+        previous = baseline.get(_key(result))
+        if previous is None:
+            continue
+        ratio = result["stats"]["median_s"] / previous["stats"]["median_s"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"{ratio:6.2f}x  {result['name']} {result['params']} {flag}", file=sys.stderr)
+    return regressions
+
+
+async def run(args) -> dict:
+    results = []
+    if not args.skip_extraction:
+        results += await bench_extraction(_parse_ints(args.pages), args.repeat)
+    if not args.skip_upload:
+        results += await bench_save_upload(args.upload_mb, args.repeat)
+    if not args.skip_index:
+        results += await bench_inverted_index(_parse_ints(args.index_sizes), args.repeat, args)
+    if args.database_url:
+        results += await bench_search(_parse_ints(args.db_sizes), args.repeat, args)
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run DocProc service benchmarks")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--pages", default="1,10,100", help="PDF page counts for extraction")
+    parser.add_argument("--upload-mb", type=int, default=20, help="upload size for save_upload")
+    parser.add_argument(
+        "--database-url",
+        help="empty Postgres database for search benchmarks; search is skipped without it",
+    )
+    parser.add_argument("--db-sizes", default="1000,10000,100000", help="corpus sizes to seed")
+    parser.add_argument(
+        "--index-sizes",
+        default="1000,10000",
+        help="corpus sizes for the inverted index benchmarks",
+    )
+    parser.add_argument("--pages-per-doc", type=int, default=2)
+    parser.add_argument("--words-per-page", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep-data", action="store_true", help="leave the seeded corpus in place")
+    parser.add_argument("--skip-extraction", action="store_true")
+    parser.add_argument("--skip-upload", action="store_true")
+    parser.add_argument("--skip-index", action="store_true")
+    parser.add_argument("--compare", help="baseline JSON to compare medians against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="median ratio above which a case counts as a regression",
+    )
+    args = parser.parse_args()
+
+    if args.database_url:
+        # app.database builds its engine from the environment at import time.
+        os.environ["DATABASE_URL"] = args.database_url
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare and compare(args.compare, report, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import admission
+from app.admission import AdmissionMiddleware, extraction_finished, extraction_scheduled
+from app.config import settings
+
+
+async def _call(app, method, path):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": []}
+    await app(scope, receive, send)
+    return messages[0]["status"], dict(messages[0]["headers"])
+
+
+async def _ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_MODE", "background")
+    monkeypatch.setattr(settings, "MAX_INFLIGHT_UPLOADS", 2)
+    monkeypatch.setattr(settings, "MAX_PENDING_EXTRACTIONS", 3)
+    monkeypatch.setattr(settings, "MAX_PENDING_EXTRACTION_BYTES", 1000)
+    monkeypatch.setattr(settings, "ADMISSION_RETRY_AFTER_SECONDS", 7)
+    monkeypatch.setitem(admission._state, "inflight_uploads", 0)
+    monkeypatch.setitem(admission._state, "background_jobs", 0)
+    monkeypatch.setitem(admission._state, "background_bytes", 0)
+
+
+@pytest.mark.asyncio
+async def test_full_backlog_rejects_uploads_with_retry_after(limits):
+    app = AdmissionMiddleware(_ok_app)
+    for _ in range(3):
+        extraction_scheduled(10)
+
+    status, headers = await _call(app, "POST", "/documents")
+    assert status == 503
+    assert headers[b"retry-after"] == b"7"
+    assert (await _call(app, "POST", "/uploads/abc/complete"))[0] == 503
+    # Reads and chunks of already-open sessions are never throttled.
+    assert (await _call(app, "GET", "/documents"))[0] == 200
+    assert (await _call(app, "PUT", "/uploads/abc"))[0] == 200
+
+    extraction_finished(10)
+    assert (await _call(app, "POST", "/documents/batch"))[0] == 200
+
+
+@pytest.mark.asyncio
+async def test_pending_bytes_limit_rejects_uploads(limits):
+    app = AdmissionMiddleware(_ok_app)
+    extraction_scheduled(1000)
+    assert (await _call(app, "POST", "/uploads"))[0] == 503
+    extraction_finished(1000)
+    assert (await _call(app, "POST", "/uploads"))[0] == 200
+
+
+@pytest.mark.asyncio
+async def test_inflight_upload_slots_are_released(limits):
+    app = AdmissionMiddleware(_ok_app)
+    admission._state["inflight_uploads"] = 2
+    assert (await _call(app, "POST", "/documents"))[0] == 503
+
+    admission._state["inflight_uploads"] = 0
+    assert (await _call(app, "POST", "/documents"))[0] == 200
+    assert admission._state["inflight_uploads"] == 0
+    depth = await admission.queue_depth()
+    assert depth["accepting_uploads"] is True
+    assert depth["pending_extractions"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_mode_counts_local_enqueues_between_checks(limits, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_MODE", "queue")
+    monkeypatch.setitem(admission._state, "queue_checked_at", admission.time.monotonic())
+    monkeypatch.setitem(admission._state, "queue_depth", (2, 0))
+    assert await admission.rejection_reason() is None
+    extraction_scheduled(10)
+    assert await admission.rejection_reason() == "jobs"
+
+
+@pytest.mark.asyncio
+async def test_extractions_that_never_ran_are_released_with_the_request(limits):
+    async def scheduling_app(scope, receive, send):
+        extraction_scheduled(10)
+        extraction_scheduled(20)
+        await _ok_app(scope, receive, send)
+        # The first background task runs; the second is skipped.
+        extraction_finished(10)
+        raise RuntimeError("client disconnected")
+
+    with pytest.raises(RuntimeError):
+        await _call(AdmissionMiddleware(scheduling_app), "POST", "/documents")
+    assert admission._state["background_jobs"] == 0
+    assert admission._state["background_bytes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unreadable_queue_depth_fails_closed(limits, monkeypatch):
+    async def unavailable():
+        raise ConnectionRefusedError("database is down")
+
+    monkeypatch.setattr(settings, "EXTRACTION_MODE", "queue")
+    monkeypatch.setitem(admission._state, "queue_checked_at", float("-inf"))
+    monkeypatch.setattr(admission, "_queued_depth", unavailable)
+
+    status, headers = await _call(AdmissionMiddleware(_ok_app), "POST", "/documents")
+    assert status == 503
+    assert headers[b"retry-after"] == b"7"
+    depth = await admission.queue_depth()
+    assert depth["pending_extractions"] is None
+    assert depth["accepting_uploads"] is False
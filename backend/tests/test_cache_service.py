@@ -0,0 +1,121 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import settings
+from app.services import cache
+from app.services.cache import MemoryCache, cached, invalidate
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = MemoryCache(max_entries=2)
+    monkeypatch.setattr(cache, "_backend", backend)
+    monkeypatch.setattr(settings, "CACHE_TTL_SECONDS", 60.0)
+    return backend
+
+
+def _loader(calls, value):
+    async def load():
+        calls.append(value)
+        return value
+
+    return load
+
+
+@pytest.mark.asyncio
+async def test_cached_reuses_value_until_invalidated(backend):
+    calls = []
+    assert await cached("tags", [], _loader(calls, ["a"])) == ["a"]
+    assert await cached("tags", [], _loader(calls, ["b"])) == ["a"]
+    assert calls == [["a"]]
+
+    await invalidate()
+    assert await cached("tags", [], _loader(calls, ["b"])) == ["b"]
+    assert calls == [["a"], ["b"]]
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used(backend):
+    await backend.set("one", 1, 60)
+    await backend.set("two", 2, 60)
+    assert await backend.get("one") == 1
+    await backend.set("three", 3, 60)
+
+    assert await backend.get("two") is None
+    assert await backend.get("one") == 1
+    assert len(backend) == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_expires_entries(backend):
+    await backend.set("stale", "value", 0)
+    assert await backend.get("stale") is None
+    assert len(backend) == 0
+
+
+@pytest.mark.asyncio
+async def test_zero_ttl_disables_cache(backend, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_TTL_SECONDS", 0)
+    calls = []
+    await cached("search", ["q"], _loader(calls, 1))
+    await cached("search", ["q"], _loader(calls, 2))
+    assert calls == [1, 2]
+    assert len(backend) == 0
+
+
+@pytest.mark.asyncio
+async def test_results_are_not_cached_while_replica_may_lag(backend, monkeypatch):
+    monkeypatch.setattr(cache, "write_settle_seconds", lambda: 60.0)
+    await invalidate()
+    calls = []
+    await cached("tags", [], _loader(calls, ["stale"]))
+    await cached("tags", [], _loader(calls, ["fresh"]))
+    assert calls == [["stale"], ["fresh"]]
+    assert len(backend) == 0
+
+
+@pytest.mark.asyncio
+async def test_unavailable_generation_bypasses_cache(backend, monkeypatch):
+    async def unavailable():
+        raise ConnectionRefusedError("database is down")
+
+    monkeypatch.setattr(backend, "generation", unavailable)
+    calls = []
+    assert await cached("tags", [], _loader(calls, ["a"])) == ["a"]
+    assert calls == [["a"]]
+    assert len(backend) == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_generation_is_reread_at_most_once_per_interval(monkeypatch):
+    reads = []
+
+    class Conn:
+        async def execute(self, statement):
+            reads.append(statement)
+            return self
+
+        def one(self):
+            return (4, 10.0)
+
+    class Engine:
+        @asynccontextmanager
+        async def connect(self):
+            yield Conn()
+
+    monkeypatch.setattr(cache, "engine", Engine())
+    backend = cache.SharedGenerationCache(max_entries=2)
+    first = await backend.generation()
+    second = await backend.generation()
+    assert first.number == second.number == 4
+    assert second.age >= first.age
+    assert len(reads) == 1
+
+    monkeypatch.setattr(cache, "GENERATION_CHECK_SECONDS", 0)
+    await backend.generation()
+    assert len(reads) == 2
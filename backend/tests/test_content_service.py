@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.content import parse_range
+
+
+def test_parse_range_bounded_and_open_ended():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=900-5000", 1000) == (900, 999)
+
+
+def test_parse_range_suffix():
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=-5000", 1000) == (0, 999)
+
+
+def test_parse_range_ignores_unsupported_forms():
+    assert parse_range("items=0-10", 1000) is None
+    assert parse_range("bytes=0-10,20-30", 1000) is None
+    assert parse_range("bytes=abc", 1000) is None
+
+
+def test_parse_range_rejects_unsatisfiable():
+    with pytest.raises(HTTPException) as excinfo:
+        parse_range("bytes=1000-", 1000)
+    assert excinfo.value.status_code == 416
+    assert excinfo.value.headers["Content-Range"] == "bytes */1000"
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.models import Document
+from app.services.documents import (
+    build_document_list_query,
+    decode_document_cursor,
+    encode_document_cursor,
+)
+from app.services.pagination import encode_cursor
+
+
+def _compile(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_document_list_query_orders_newest_first_with_limit():
+    sql = _compile(build_document_list_query(51))
+    assert "ORDER BY documents.created_at DESC, documents.id DESC" in sql
+    assert "LIMIT" in sql
+
+
+def test_document_list_query_applies_keyset_and_filters():
+    sql = _compile(
+        build_document_list_query(
+            10,
+            after=(datetime(2024, 1, 1), 5),
+            tags=["Legal"],
+            status="completed",
+            created_after=datetime(2023, 1, 1, tzinfo=timezone(timedelta(hours=2))),
+        )
+    )
+    assert "(documents.created_at, documents.id) <" in sql
+    assert "processing_statuses.status" in sql
+    assert "tags.name" in sql
+    assert "documents.created_at >=" in sql
+
+
+def test_document_list_query_multi_tag_modes():
+    all_sql = _compile(build_document_list_query(10, tags=["Legal", "q3", "legal"]))
+    assert "GROUP BY document_tags.document_id" in all_sql
+    assert "HAVING count(*) =" in all_sql
+
+    any_sql = _compile(build_document_list_query(10, tags=["legal", "q3"], tag_mode="any"))
+    assert "tags.name IN" in any_sql
+    assert "HAVING" not in any_sql
+
+
+def test_document_cursor_round_trip():
+    document = Document(id=3, created_at=datetime(2024, 5, 1, 12, 30))
+    assert decode_document_cursor(encode_document_cursor(document)) == (
+        datetime(2024, 5, 1, 12, 30),
+        3,
+    )
+
+
+def test_decode_document_cursor_rejects_missing_fields():
+    with pytest.raises(HTTPException):
+        decode_document_cursor(encode_cursor({"id": 1}))
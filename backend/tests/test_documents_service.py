@@ -0,0 +1,57 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import admission
+from app.services import documents
+
+
+@pytest.mark.asyncio
+async def test_background_extraction_errors_mark_the_document_failed(monkeypatch):
+    sessions = []
+
+    @asynccontextmanager
+    async def session():
+        sessions.append(object())
+        yield sessions[-1]
+
+    async def parse(document_id, file_path, db, data):
+        raise ConnectionResetError("connection reset")
+
+    failed = []
+
+    async def mark_failed(document_id, error_message, db):
+        failed.append((document_id, error_message, db))
+
+    monkeypatch.setattr("app.database.async_session", session)
+    monkeypatch.setattr(documents, "_parse_document_with_session", parse)
+    monkeypatch.setattr(documents, "_mark_failed", mark_failed)
+    monkeypatch.setitem(admission._state, "background_jobs", 1)
+    monkeypatch.setitem(admission._state, "background_bytes", 10)
+
+    await documents._parse_document(5, None, b"%PDF", 10)
+
+    # A fresh session, not the one the failed extraction used.
+    assert failed == [(5, "Extraction failed: connection reset", sessions[1])]
+    assert admission._state["background_jobs"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_extraction_timeouts_are_not_retried(monkeypatch):
+    async def timeout(source):
+        raise TimeoutError("PDF extraction exceeded 300s")
+
+    failed = []
+
+    async def mark_failed(document_id, error_message, db):
+        failed.append((document_id, error_message))
+
+    monkeypatch.setattr(documents, "extract_pages_from_pdf", timeout)
+    monkeypatch.setattr(documents, "_mark_failed", mark_failed)
+
+    await documents._parse_document_with_session(5, "/tmp/x.pdf", None, raise_retryable=True)
+    assert failed == [(5, "PDF extraction exceeded 300s")]
@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.extraction import ExtractionEngine, ExtractionFailed, is_memory_error
+
+
+def _allocate_pixmap(size: int) -> int:
+    import fitz
+
+    return len(fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, size, size)).samples)
+
+
+@pytest.mark.asyncio
+async def test_extraction_engine_runs_in_pool():
+    engine = ExtractionEngine(max_workers=1)
+    try:
+        assert await engine.run(sum, [1, 2, 3]) == 6
+        assert engine.pending == 0
+    finally:
+        engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_extraction_engine_enforces_timeout():
+    engine = ExtractionEngine(max_workers=1, timeout=0.5)
+    try:
+        with pytest.raises(TimeoutError):
+            await engine.run(time.sleep, 2)
+        assert engine.pending == 0
+    finally:
+        engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_extraction_engine_replaces_worker_after_timeout():
+    engine = ExtractionEngine(max_workers=1, timeout=0.5)
+    try:
+        with pytest.raises(TimeoutError):
+            await engine.run(time.sleep, 2)
+        assert await engine.run(sum, [1, 2]) == 3
+    finally:
+        engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_extraction_engine_enforces_memory_limit():
+    engine = ExtractionEngine(max_workers=1, memory_limit_mb=256)
+    try:
+        with pytest.raises(ExtractionFailed, match="256 MB memory limit"):
+            # MuPDF reports this as RuntimeError("malloc of ... bytes failed").
+            await engine.run(_allocate_pixmap, 20000)
+        assert await engine.run(_allocate_pixmap, 4) == 48
+    finally:
+        engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_extraction_engine_survives_worker_crash():
+    engine = ExtractionEngine(max_workers=1)
+    try:
+        with pytest.raises(ExtractionFailed, match="exit code 3"):
+            await engine.run(os._exit, 3)
+        assert await engine.run(sum, [4, 5]) == 9
+    finally:
+        engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_extraction_engine_forwards_errors_and_recycles_workers():
+    engine = ExtractionEngine(max_workers=1, max_tasks_per_child=1)
+    try:
+        with pytest.raises(ValueError):
+            await engine.run(int, "not a number")
+        first = await engine.run(os.getpid)
+        second = await engine.run(os.getpid)
+        assert first != second != os.getpid()
+    finally:
+        engine.shutdown()
+
+
+def test_is_memory_error_recognizes_mupdf_allocation_failures():
+    assert is_memory_error(MemoryError())
+    assert is_memory_error(RuntimeError("malloc of 1200000000 bytes failed"))
+    assert not is_memory_error(RuntimeError("syntax error in content stream"))
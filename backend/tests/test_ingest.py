@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import ingest
+from app.ingest import ingest_file, iter_source, load_checkpoint
+
+
+def test_iter_source_walks_directory_for_pdfs(tmp_path):
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "a.pdf").write_bytes(b"")
+    (tmp_path / "nested" / "b.PDF").write_bytes(b"")
+    (tmp_path / "notes.txt").write_bytes(b"")
+
+    paths = list(iter_source(str(tmp_path)))
+    assert paths == [str(tmp_path / "a.pdf"), str(tmp_path / "nested" / "b.PDF")]
+
+
+def test_iter_source_reads_manifest_relative_to_itself(tmp_path):
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# comment\none.pdf\n\n/abs/two.pdf\n")
+
+    assert list(iter_source(str(manifest))) == [str(tmp_path / "one.pdf"), "/abs/two.pdf"]
+
+
+def test_load_checkpoint(tmp_path):
+    checkpoint = tmp_path / "ingest.checkpoint"
+    assert load_checkpoint(str(checkpoint)) == set()
+    checkpoint.write_text("/a.pdf\n/b.pdf\n")
+    assert load_checkpoint(str(checkpoint)) == {"/a.pdf", "/b.pdf"}
+
+
+def test_ingest_file_reports_invalid_pdf(tmp_path):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"not a pdf")
+
+    result = ingest_file(str(path))
+    assert result.pages is None
+    assert result.file_size == 9
+    assert result.error == "Invalid or corrupted PDF"
+
+
+def test_ingest_file_records_extraction_errors(tmp_path, monkeypatch):
+    def broken(path):
+        raise RuntimeError("syntax error in content stream")
+
+    monkeypatch.setattr(ingest, "extract_pages", broken)
+    path = tmp_path / "bad.pdf"
+    path.write_bytes(b"%PDF")
+
+    result = ingest_file(str(path))
+    assert result.pages is None
+    assert result.error == "syntax error in content stream"
+
+
+def test_ingest_file_leaves_memory_errors_to_the_engine(tmp_path, monkeypatch):
+    def huge(path):
+        raise RuntimeError("malloc of 1200000000 bytes failed")
+
+    monkeypatch.setattr(ingest, "extract_pages", huge)
+    path = tmp_path / "huge.pdf"
+    path.write_bytes(b"%PDF")
+
+    with pytest.raises(RuntimeError):
+        ingest_file(str(path))
+
+
+def test_ingest_file_reports_missing_file(tmp_path):
+    result = ingest_file(str(tmp_path / "missing.pdf"))
+    assert result.pages is None
+    assert "No such file" in result.error
@@ -0,0 +1,137 @@
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.inverted_index import IndexMetadata, InvertedIndex, tokenize
+from app.services.search_backend import InvertedIndexBackend, SearchBackend
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = InvertedIndex(str(tmp_path / "index.sqlite3"))
+    index.replace_document(1, "alpha_report.pdf", [], ["alpha beta\n", "gamma\n"])
+    index.replace_document(2, "notes.pdf", ["finance"], ["alpha alpha alpha\n"])
+    index.replace_document(3, "other.pdf", [], ["beta delta\n"])
+    return index
+
+
+def test_tokenize_splits_filenames():
+    assert tokenize("Alpha_Report-2024.pdf") == ["alpha", "report", "2024", "pdf"]
+
+
+def test_search_requires_every_term(index):
+    hits, total = index.search("alpha beta", 10)
+    assert [hit.id for hit in hits] == [1]
+    assert total == 1
+    assert index.search("alpha missing", 10) == ([], 0)
+
+
+def test_search_ranks_by_bm25(index):
+    hits, total = index.search("alpha", 10)
+    assert total == 2
+    # The filename boost outweighs three body occurrences.
+    assert [hit.id for hit in hits] == [1, 2]
+    assert hits[0].rank > hits[1].rank
+
+
+def test_search_reports_pages_and_snippet(index):
+    hits, _ = index.search("gamma", 10)
+    assert hits[0].pages == [2]
+    assert hits[0].snippet == "alpha beta\ngamma\n"
+    assert hits[0].filename == "alpha_report.pdf"
+
+
+def test_search_matches_tags(index):
+    hits, _ = index.search("finance", 10)
+    assert [hit.id for hit in hits] == [2]
+    assert hits[0].pages == []
+
+
+def test_search_pages_after_cursor(index):
+    first, _ = index.search("alpha", 1)
+    second, _ = index.search("alpha", 1, after=(first[0].rank, first[0].id))
+    assert [hit.id for hit in first + second] == [1, 2]
+
+
+def test_replace_and_delete_update_postings(index):
+    index.replace_document(3, "other.pdf", [], ["epsilon\n"])
+    assert index.search("delta", 10) == ([], 0)
+    assert [hit.id for hit in index.search("epsilon", 10)[0]] == [3]
+
+    index.delete_documents([1, 3, 99])
+    assert index.document_ids() == {2}
+    assert [hit.id for hit in index.search("alpha", 10)[0]] == [2]
+
+
+def test_older_versions_do_not_overwrite_newer_ones(index):
+    index.replace_document(3, "other.pdf", [], ["epsilon\n"], version=3)
+    index.replace_document(3, "other.pdf", [], ["zeta\n"], version=2)
+    assert index.search("zeta", 10) == ([], 0)
+    assert [hit.id for hit in index.search("epsilon", 10)[0]] == [3]
+
+    index.replace_document(3, "other.pdf", [], ["zeta\n"], version=3)
+    assert [hit.id for hit in index.search("zeta", 10)[0]] == [3]
+
+
+def test_metadata_update_matches_a_full_rewrite(index, tmp_path):
+    assert index.update_metadata(
+        [IndexMetadata(2, 2, "notes.pdf", ["audit", "alpha"]), IndexMetadata(9, 1, "new.pdf", [])]
+    ) == [9]
+    assert [hit.id for hit in index.search("audit", 10)[0]] == [2]
+    assert index.search("finance", 10) == ([], 0)
+    hits, _ = index.search("alpha", 10)
+    # Page postings survive the tag change.
+    assert {hit.id: hit.pages for hit in hits}[2] == [1]
+
+    rebuilt = InvertedIndex(str(tmp_path / "rebuilt.sqlite3"))
+    rebuilt.replace_document(1, "alpha_report.pdf", [], ["alpha beta\n", "gamma\n"])
+    rebuilt.replace_document(2, "notes.pdf", ["audit", "alpha"], ["alpha alpha alpha\n"])
+    rebuilt.replace_document(3, "other.pdf", [], ["beta delta\n"])
+    for query in ("alpha", "audit", "notes"):
+        assert index.search(query, 10) == rebuilt.search(query, 10)
+
+
+def test_deleted_documents_are_not_written_back(index):
+    index.delete_documents([3, 42])
+    # A sync that read the documents before their delete committed.
+    index.replace_document(3, "other.pdf", [], ["beta delta\n"], version=9)
+    index.replace_document(42, "late.pdf", [], ["omega\n"])
+    assert index.update_metadata([IndexMetadata(3, 9, "other.pdf", ["x"])]) == []
+    assert index.document_ids() == {1, 2}
+    assert index.search("delta", 10) == ([], 0)
+
+
+def test_clear_empties_index(index):
+    index.clear()
+    assert index.document_ids() == set()
+    assert index.search("alpha", 10) == ([], 0)
+
+
+@pytest.mark.asyncio
+async def test_backend_pages_with_cursor(index):
+    backend = InvertedIndexBackend(index)
+    first = await backend.search(None, "alpha", limit=1)
+    assert [item.id for item in first.items] == [1]
+    assert first.total_estimate == 2
+    assert first.next_cursor
+
+    second = await backend.search(None, "alpha", limit=1, cursor=first.next_cursor)
+    assert [item.id for item in second.items] == [2]
+    assert second.next_cursor is None
+    assert second.total_estimate is None
+
+
+@pytest.mark.asyncio
+async def test_backend_rejects_other_modes(index):
+    with pytest.raises(HTTPException) as exc:
+        await InvertedIndexBackend(index).search(None, "alpha", mode="ilike")
+    assert exc.value.status_code == 400
+
+
+def test_search_backend_requires_search():
+    with pytest.raises(TypeError):
+        SearchBackend()
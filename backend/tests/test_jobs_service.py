@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import settings
+from app.services.jobs import backoff_delay, build_claim_query
+
+
+def test_build_claim_query_skips_locked_rows():
+    sql = str(build_claim_query()).upper()
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "RETURNING" in sql
+    assert ":WORKER_ID" in sql
+
+
+def test_backoff_delay_grows_and_caps():
+    assert backoff_delay(1) == settings.JOB_RETRY_BASE_SECONDS
+    assert backoff_delay(2) == settings.JOB_RETRY_BASE_SECONDS * 2
+    assert backoff_delay(50) == settings.JOB_RETRY_MAX_SECONDS
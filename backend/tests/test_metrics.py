@@ -0,0 +1,90 @@
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.metrics import PrometheusMiddleware, _operation, observe_extraction
+
+
+def _sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+def test_operation_label_uses_leading_keyword():
+    assert _operation("  select 1") == "SELECT"
+    assert _operation("WITH q AS (SELECT 1) SELECT * FROM q") == "WITH"
+    assert _operation("ALTER TABLE documents ADD COLUMN x int") == "OTHER"
+    assert _operation("") == "OTHER"
+
+
+def test_observe_extraction_records_throughput():
+    before = _sample("docproc_extraction_pages_per_second_count")
+    observe_extraction("completed", 0.5, pages=10)
+    observe_extraction("invalid", 0.1)
+    assert _sample("docproc_extraction_pages_per_second_count") == before + 1
+    assert _sample("docproc_extraction_duration_seconds_count", {"outcome": "invalid"}) >= 1
+
+
+async def _get(app, path):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+
+@pytest.mark.asyncio
+async def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = _sample("docproc_http_request_duration_seconds_count", labels)
+    assert await _get(app, "/items/1") == 200
+    assert await _get(app, "/items/2") == 200
+    assert await _get(app, "/missing") == 404
+
+    assert _sample("docproc_http_request_duration_seconds_count", labels) == before + 2
+    assert _sample(
+        "docproc_http_request_duration_seconds_count",
+        {"method": "GET", "route": "unmatched", "status": "404"},
+    ) >= 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_survives_database_errors(monkeypatch):
+    import app.main as main
+
+    def unavailable():
+        raise ConnectionRefusedError("database is down")
+
+    monkeypatch.setattr(main, "async_session", unavailable)
+    monkeypatch.setattr("app.metrics._database_gauges_refreshed", float("-inf"))
+    assert await _get(main.app, "/metrics") == 200
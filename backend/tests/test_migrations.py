@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.migrations import LATEST_VERSION, MIGRATIONS
+
+
+def test_migrations_are_ordered_and_unique():
+    versions = [migration.version for migration in MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert versions[0] == 1
+    assert LATEST_VERSION == versions[-1]
+
+
+def test_api_import_does_not_load_mupdf():
+    # Cold start should not pay for MuPDF; only extraction processes import it.
+    backend_dir = os.path.join(os.path.dirname(__file__), "..")
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, app.main; print('fitz' in sys.modules)"],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
@@ -1,11 +1,12 @@
 import os
 import sys
 
+import fitz
 import pytest
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app.services.pdf_processor import extract_text_from_pdf
+from app.services.pdf_processor import extract_pages, extract_text_from_pdf
 
 
 @pytest.mark.asyncio
@@ -15,3 +16,29 @@ async def test_extract_text_from_pdf_invalid(tmp_path):
 
     with pytest.raises(ValueError):
         await extract_text_from_pdf(str(file_path))
+
+
+def test_extract_pages_returns_text_per_page(tmp_path):
+    file_path = tmp_path / "two_pages.pdf"
+    doc = fitz.open()
+    for label in ("first page", "second page"):
+        page = doc.new_page()
+        page.insert_text((72, 72), label)
+    doc.save(str(file_path))
+    doc.close()
+
+    pages = extract_pages(str(file_path))
+    assert len(pages) == 2
+    assert "first page" in pages[0]
+    assert "second page" in pages[1]
+
+
+def test_extract_pages_strips_nul_characters(tmp_path, monkeypatch):
+    file_path = tmp_path / "nul.pdf"
+    doc = fitz.open()
+    doc.new_page()
+    doc.save(str(file_path))
+    doc.close()
+
+    monkeypatch.setattr(fitz.Page, "get_text", lambda self, *args, **kwargs: "a\x00b")
+    assert extract_pages(str(file_path)) == ["ab"]
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import database
+from app.config import settings
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    monkeypatch.setattr(database, "read_engine", object())
+    monkeypatch.setattr(database, "_replica_state", {"checked_at": float("-inf"), "usable": True})
+    monkeypatch.setattr(settings, "DATABASE_READ_MAX_LAG_SECONDS", 5.0)
+    return monkeypatch
+
+
+@pytest.mark.asyncio
+async def test_reads_use_primary_without_replica():
+    assert database.read_engine is database.engine
+    assert await database.replica_usable() is False
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_falls_back_to_primary(replica):
+    async def lag():
+        return 30.0
+
+    replica.setattr(database, "replica_lag_seconds", lag)
+    assert await database.replica_usable() is False
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_falls_back_and_is_rechecked_later(replica):
+    calls = []
+
+    async def lag():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("connection refused")
+        return 0.5
+
+    replica.setattr(database, "replica_lag_seconds", lag)
+    assert await database.replica_usable() is False
+    assert await database.replica_usable() is False
+    assert len(calls) == 1
+
+    database._replica_state["checked_at"] -= database.REPLICA_LAG_CHECK_SECONDS
+    assert await database.replica_usable() is True
@@ -0,0 +1,39 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.retention import build_bulk_delete
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_bulk_delete_is_a_single_returning_statement():
+    sql = _sql(build_bulk_delete(document_ids=list(range(20000))))
+    assert sql.startswith("DELETE FROM documents")
+    assert "RETURNING documents.id" in sql
+    assert "array_agg(extraction_jobs.file_path)" in sql
+    assert "ANY" in sql
+    assert "LIMIT" not in sql
+    assert "FOR UPDATE" not in sql
+
+
+def test_bulk_delete_filters_by_tag_and_age():
+    cutoff = datetime(2024, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+    statement = build_bulk_delete(tag=" Legal ", created_before=cutoff)
+    params = statement.compile(dialect=postgresql.dialect()).params
+    assert "legal" in params.values()
+    assert datetime(2024, 1, 1, 10) in params.values()
+    assert "document_tags" in _sql(statement)
+
+
+def test_purge_batches_are_bounded_and_skip_locked_rows():
+    sql = _sql(build_bulk_delete(created_before=datetime(2024, 1, 1), limit=500, skip_locked=True))
+    assert "ORDER BY documents.created_at, documents.id" in sql
+    assert "LIMIT" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
@@ -1,9 +1,20 @@
 import os
 import sys
 
+import pytest
+from fastapi import HTTPException
+
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app.services.search import _escape_like, build_search_query
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.search import (
+    _escape_like,
+    build_fulltext_query,
+    build_fuzzy_query,
+    build_fuzzy_threshold_query,
+    build_search_query,
+    build_search_vector_update,
+)
 
 
 def test_escape_like():
@@ -13,7 +24,7 @@ def test_escape_like():
 def test_build_search_query_binds_params():
     sql, params = build_search_query("report")
     assert ":pattern" in str(sql)
-    assert "substring" in str(sql).lower()
+    assert "left(document_pages.text" in str(sql).lower()
     assert "tags" in str(sql).lower()
     assert params["pattern"].startswith("%")
 
@@ -22,3 +33,78 @@ def test_build_search_query_blocks_injection():
     sql, params = build_search_query("%' OR 1=1 --")
     assert ":pattern" in str(sql)
     assert params["pattern"].startswith("%")
+
+
+def test_build_search_query_returns_page_hits():
+    sql, params = build_search_query("report")
+    assert "document_pages" in str(sql)
+    assert params["max_page_hits"] > 0
+
+
+def test_build_search_query_paginates_by_id():
+    sql, params = build_search_query("report", limit=21, after_id=100)
+    assert ":after_id" in str(sql)
+    assert "ORDER BY documents.id DESC" in str(sql)
+    assert params["limit"] == 21
+
+
+def test_build_fulltext_query_ranks_with_websearch_tsquery():
+    sql, params = build_fulltext_query("annual report", limit=10)
+    lowered = str(sql).lower()
+    assert "websearch_to_tsquery" in lowered
+    assert "ts_rank" in lowered
+    assert ":after_rank" not in lowered
+    assert params["query"] == "annual report"
+
+
+def test_build_fulltext_query_applies_cursor():
+    sql, params = build_fulltext_query("report", limit=10, after=(0.5, 42))
+    assert ":after_rank" in str(sql)
+    assert params["after_rank"] == 0.5
+    assert params["after_id"] == 42
+
+
+def test_build_fuzzy_query_matches_all_fields_by_word_similarity():
+    sql, params = build_fuzzy_query("invoise", limit=10, after=(0.7, 42))
+    text_sql = str(sql)
+    for column in ("documents.filename", "tags.name", "document_pages.text"):
+        assert f":query <% {column}" in text_sql
+    assert "ORDER BY hits.rank DESC, hits.id DESC" in text_sql
+    assert params["query"] == "invoise"
+    assert params["after_rank"] == 0.7
+
+
+def test_fuzzy_threshold_is_transaction_local():
+    sql, params = build_fuzzy_threshold_query(0.4)
+    assert "pg_trgm.word_similarity_threshold" in str(sql)
+    assert "true" in str(sql)
+    assert params == {"threshold": "0.4"}
+
+
+def test_search_vector_weights_filename_and_tags_only():
+    sql = str(build_search_vector_update())
+    for weight in ("'A'", "'B'"):
+        assert weight in sql
+    assert "document_pages" not in sql
+    assert ":document_ids" in sql
+
+
+def test_fulltext_matches_pages_through_their_own_index():
+    sql, params = build_fulltext_query("annual report", limit=10)
+    text_sql = str(sql)
+    # Same expression as ix_document_pages_text_fts, and no truncation.
+    assert "to_tsvector('english', document_pages.text) @@" in text_sql
+    assert "documents.search_vector @@" in text_sql
+    assert "left(" not in text_sql.split("AS snippet")[1]
+    assert params["content_weight"] > 0
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"id": 7, "rank": 0.25})
+    assert decode_cursor(cursor) == {"id": 7, "rank": 0.25}
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor("not-a-cursor!")
+    assert excinfo.value.status_code == 400
@@ -1,6 +1,8 @@
+import hashlib
 import io
 import os
 import sys
+import tempfile
 
 import pytest
 from fastapi import HTTPException
@@ -53,10 +55,57 @@ async def test_save_upload_success(tmp_path):
         file=io.BytesIO(b"content"),
         headers=Headers({"content-type": "application/pdf"}),
     )
-    file_path, size, original = await save_upload(upload, str(tmp_path), max_bytes=1024)
-    assert original == "ok.pdf"
-    assert size == 7
-    assert tmp_path.joinpath(file_path.split("/")[-1]).exists()
+    stored = await save_upload(upload, str(tmp_path), max_bytes=1024)
+    assert stored.original_name == "ok.pdf"
+    assert stored.file_size == 7
+    assert stored.content_hash == hashlib.sha256(b"content").hexdigest()
+    assert stored.data is None
+    assert tmp_path.joinpath(stored.file_path.split("/")[-1]).exists()
+
+
+@pytest.mark.asyncio
+async def test_save_upload_copies_spooled_file(tmp_path):
+    payload = os.urandom(3 * 1024 * 1024)
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024, dir=tmp_path)
+    spooled.write(payload)
+    upload = UploadFile(
+        filename="big.pdf",
+        file=spooled,
+        headers=Headers({"content-type": "application/pdf"}),
+    )
+    stored = await save_upload(upload, str(tmp_path / "uploads"), max_bytes=len(payload))
+    with open(stored.file_path, "rb") as handle:
+        assert handle.read() == payload
+    assert stored.content_hash == hashlib.sha256(payload).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_save_upload_writes_in_memory_spool_without_rollover(tmp_path):
+    payload = b"%PDF-" + os.urandom(500)
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024, dir=tmp_path)
+    spooled.write(payload)
+    upload = UploadFile(
+        filename="small.pdf",
+        file=spooled,
+        headers=Headers({"content-type": "application/pdf"}),
+    )
+    stored = await save_upload(upload, str(tmp_path / "uploads"), max_bytes=1024)
+    assert not spooled._rolled
+    with open(stored.file_path, "rb") as handle:
+        assert handle.read() == payload
+
+
+@pytest.mark.asyncio
+async def test_save_upload_keeps_small_files_in_memory(tmp_path):
+    upload = UploadFile(
+        filename="small.pdf",
+        file=io.BytesIO(b"%PDF-small"),
+        headers=Headers({"content-type": "application/pdf"}),
+    )
+    stored = await save_upload(upload, str(tmp_path), max_bytes=1024, inline_max_bytes=64)
+    assert stored.file_path is None
+    assert stored.data == b"%PDF-small"
+    assert not any(tmp_path.iterdir())
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.tags import (
+    build_link_delete,
+    build_link_insert,
+    build_tag_list_query,
+    build_tag_upsert,
+    normalize_tag_names,
+)
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_normalize_tag_names_dedupes_and_lowercases():
+    assert normalize_tag_names(["Legal", " legal ", "Q3"]) == ["legal", "q3"]
+
+
+def test_normalize_tag_names_rejects_blank_and_long_names():
+    with pytest.raises(HTTPException):
+        normalize_tag_names(["  "])
+    with pytest.raises(HTTPException):
+        normalize_tag_names(["x" * 101])
+
+
+def test_bulk_statements_are_set_based():
+    upsert = _sql(build_tag_upsert(["a", "b"]))
+    assert "ON CONFLICT (name) DO NOTHING" in upsert
+
+    link = _sql(build_link_insert(list(range(20000)), ["a"]))
+    assert "INSERT INTO document_tags" in link
+    assert "ON CONFLICT DO NOTHING" in link
+    assert "= ANY (" in link
+    assert link.count("%(") < 5
+
+    unlink = _sql(build_link_delete([1, 2], ["a"]))
+    assert unlink.startswith("DELETE FROM document_tags")
+    assert "RETURNING document_tags.document_id" in unlink
+
+
+def test_tag_list_query_uses_literal_prefix_pattern():
+    query = build_tag_list_query(prefix=" Q3_", limit=10, order="count")
+    sql = _sql(query)
+    assert "tags.name LIKE" in sql
+    assert "ESCAPE" not in sql
+    assert "ORDER BY tags.document_count DESC, tags.name" in sql
+    assert query.compile(dialect=postgresql.dialect()).params["name_1"] == "q3\\_%"
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import sys
+import time
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import settings
+from app.services import uploads
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_MAX_BYTES", 1024)
+    return tmp_path
+
+
+async def _body(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_chunks_resume_and_finalize(upload_dir):
+    payload = b"%PDF-" + os.urandom(995)
+    session = uploads.create_session("../report.pdf", len(payload))
+    assert session.filename == "report.pdf"
+    assert session.offset == 0
+
+    state = await uploads.append_chunk(session.id, 0, _body(payload[:300], payload[300:400]))
+    assert state.offset == 400
+    assert uploads.get_session(session.id).offset == 400
+
+    state = await uploads.append_chunk(session.id, 400, _body(payload[400:]))
+    assert state.offset == len(payload)
+
+    async with uploads.finalize_session(session.id) as stored:
+        assert stored.file_size == len(payload)
+        assert stored.content_hash == hashlib.sha256(payload).hexdigest()
+        with open(stored.file_path, "rb") as handle:
+            assert handle.read() == payload
+    with pytest.raises(HTTPException) as exc:
+        uploads.get_session(session.id)
+    assert exc.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_failed_completion_restores_the_session(upload_dir):
+    payload = b"%PDF-" + os.urandom(95)
+    session = uploads.create_session("report.pdf", len(payload))
+    await uploads.append_chunk(session.id, 0, _body(payload))
+
+    with pytest.raises(RuntimeError):
+        async with uploads.finalize_session(session.id) as stored:
+            raise RuntimeError("insert failed")
+    assert not os.path.exists(stored.file_path)
+    assert uploads.get_session(session.id).offset == len(payload)
+
+    async with uploads.finalize_session(session.id) as stored:
+        assert os.path.getsize(stored.file_path) == len(payload)
+
+
+@pytest.mark.asyncio
+async def test_offset_mismatch_reports_current_offset():
+    session = uploads.create_session("a.pdf", 100)
+    await uploads.append_chunk(session.id, 0, _body(b"x" * 10))
+    with pytest.raises(HTTPException) as exc:
+        await uploads.append_chunk(session.id, 0, _body(b"y"))
+    assert exc.value.status_code == 409
+    assert exc.value.headers["Upload-Offset"] == "10"
+
+
+@pytest.mark.asyncio
+async def test_oversized_chunk_is_discarded():
+    session = uploads.create_session("a.pdf", 20)
+    await uploads.append_chunk(session.id, 0, _body(b"x" * 10))
+    with pytest.raises(HTTPException) as exc:
+        await uploads.append_chunk(session.id, 10, _body(b"y" * 5, b"y" * 10))
+    assert exc.value.status_code == 413
+    assert uploads.get_session(session.id).offset == 10
+
+    with pytest.raises(HTTPException) as exc:
+        async with uploads.finalize_session(session.id):
+            pass
+    assert exc.value.status_code == 409
+
+
+def test_create_session_validates_name_and_size(monkeypatch):
+    with pytest.raises(HTTPException):
+        uploads.create_session("notes.txt", 10)
+    monkeypatch.setattr(settings, "MAX_RESUMABLE_UPLOAD_BYTES", 10)
+    with pytest.raises(HTTPException) as exc:
+        uploads.create_session("big.pdf", 11)
+    assert exc.value.status_code == 413
+
+
+def test_unknown_or_malformed_ids_are_not_found():
+    for upload_id in ("0" * 32, "../../etc/passwd"):
+        with pytest.raises(HTTPException) as exc:
+            uploads.get_session(upload_id)
+        assert exc.value.status_code == 404
+
+
+def test_sweep_removes_idle_sessions(monkeypatch):
+    idle = uploads.create_session("idle.pdf", 10)
+    active = uploads.create_session("active.pdf", 10)
+    meta_path, part_path = uploads._paths(idle.id)
+    stale = time.time() - settings.UPLOAD_SESSION_TTL_SECONDS - 1
+    os.utime(part_path, (stale, stale))
+
+    assert uploads.sweep_expired_sessions(force=True) == 1
+    assert not os.path.exists(meta_path)
+    assert uploads.get_session(active.id).offset == 0
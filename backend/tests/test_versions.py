@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.versions import document_etag, etag_matches, list_etag
+
+
+def test_document_etag_varies_with_version_and_representation():
+    assert document_etag(7, 1) != document_etag(7, 2)
+    assert document_etag(7, 1) != document_etag(7, 1, include_content=False)
+    assert document_etag(7, 1).startswith('"')
+
+
+def test_list_etag_tracks_rows_and_cursor():
+    base = list_etag([(2, 1), (1, 1)], None)
+    assert base == list_etag([(2, 1), (1, 1)], None)
+    assert base != list_etag([(2, 2), (1, 1)], None)
+    assert base != list_etag([(2, 1), (1, 1)], "cursor")
+
+
+def test_etag_matches_handles_lists_weak_and_wildcard():
+    etag = document_etag(1, 3)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(document_etag(1, 2), etag)
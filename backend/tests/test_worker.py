@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import worker
+from app.config import settings
+from app.services.extraction import ExtractionFailed
+from app.services.jobs import ClaimedJob
+
+JOB = ClaimedJob(id=7, document_id=3, file_path="/nonexistent/upload.pdf", attempts=1, max_attempts=5)
+
+
+@asynccontextmanager
+async def _no_session():
+    yield None
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    async def complete_job(db, job_id, worker_id):
+        calls.append(("complete", job_id, worker_id))
+        return True
+
+    async def fail_job(db, job, worker_id, error_message):
+        calls.append(("fail", job.id, error_message))
+        return True
+
+    monkeypatch.setattr(worker, "async_session", _no_session)
+    monkeypatch.setattr(worker, "complete_job", complete_job)
+    monkeypatch.setattr(worker, "fail_job", fail_job)
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 0.3)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_run_job_retries_retryable_failures(monkeypatch, calls):
+    async def crash(job):
+        raise ExtractionFailed("PDF extraction worker crashed (exit code -9)", retryable=True)
+
+    monkeypatch.setattr(worker, "_extract", crash)
+    await worker._run_job(JOB, "w1")
+    assert calls == [("fail", 7, "PDF extraction worker crashed (exit code -9)")]
+
+
+@pytest.mark.asyncio
+async def test_run_job_completes_owned_job(monkeypatch, calls):
+    async def extract(job):
+        pass
+
+    monkeypatch.setattr(worker, "_extract", extract)
+    await worker._run_job(JOB, "w1")
+    assert calls == [("complete", 7, "w1")]
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_survives_errors_and_stops_when_lease_is_lost(monkeypatch, calls):
+    results = iter([RuntimeError("connection reset"), True, False])
+
+    async def extend_lease(db, job_id, worker_id):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(worker, "extend_lease", extend_lease)
+    await asyncio.wait_for(worker._heartbeat(7, "w1"), timeout=2)
+    assert next(results, None) is None
+
+
+@pytest.mark.asyncio
+async def test_run_job_abandons_job_after_losing_lease(monkeypatch, calls):
+    async def extend_lease(db, job_id, worker_id):
+        return False
+
+    async def slow_extract(job):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(worker, "extend_lease", extend_lease)
+    monkeypatch.setattr(worker, "_extract", slow_extract)
+    await asyncio.wait_for(worker._run_job(JOB, "w1"), timeout=2)
+    assert calls == []
@@ -19,14 +19,21 @@ export async function uploadDocument(file) {
   return handleJsonResponse(response);
 }
 
-export async function getDocuments() {
-  const response = await fetch(`${API_BASE}/documents`);
-  return handleJsonResponse(response);
+export async function getDocuments(cursor) {
+  const params = new URLSearchParams();
+  if (cursor) params.set('cursor', cursor);
+  const response = await fetch(`${API_BASE}/documents?${params}`);
+  const data = await handleJsonResponse(response);
+  return { items: data.items, nextCursor: data.next_cursor };
 }
 
-export async function getDocumentsByTag(tag) {
-  const response = await fetch(`${API_BASE}/documents?tag=${encodeURIComponent(tag)}`);
-  return handleJsonResponse(response);
+export async function getDocumentsByTag(tags, mode = 'all', cursor) {
+  const params = new URLSearchParams({ tag_mode: mode });
+  [].concat(tags).forEach((tag) => params.append('tag', tag));
+  if (cursor) params.set('cursor', cursor);
+  const response = await fetch(`${API_BASE}/documents?${params}`);
+  const data = await handleJsonResponse(response);
+  return { items: data.items, nextCursor: data.next_cursor };
 }
 
 export async function getDocument(id) {
@@ -34,6 +41,14 @@ export async function getDocument(id) {
   return handleJsonResponse(response);
 }
 
+export async function getDocumentContent(id) {
+  const response = await fetch(`${API_BASE}/documents/${id}/content`);
+  if (!response.ok) {
+    await handleJsonResponse(response);
+  }
+  return response.text();
+}
+
 export async function deleteDocument(id) {
   const response = await fetch(`${API_BASE}/documents/${id}`, {
     method: 'DELETE',
@@ -43,11 +58,17 @@ export async function deleteDocument(id) {
 
 export async function searchDocuments(query) {
   const response = await fetch(`${API_BASE}/search?q=${encodeURIComponent(query)}`);
-  return handleJsonResponse(response);
+  const data = await handleJsonResponse(response);
+  return data.items;
 }
 
-export async function getTags() {
-  const response = await fetch(`${API_BASE}/tags`);
+export async function getTags({ prefix, limit, withCounts, order } = {}) {
+  const params = new URLSearchParams();
+  if (prefix) params.set('prefix', prefix);
+  if (limit) params.set('limit', limit);
+  if (withCounts) params.set('with_counts', 'true');
+  if (order) params.set('order', order);
+  const response = await fetch(`${API_BASE}/tags?${params}`);
   return handleJsonResponse(response);
 }
 
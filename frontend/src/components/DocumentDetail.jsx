@@ -1,11 +1,14 @@
 import { useState, useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import { addTag, deleteDocument, getDocument, getTags, removeTag } from '../api'
+import { addTag, deleteDocument, getDocument, getDocumentContent, getTags, removeTag } from '../api'
+
+const SUGGESTION_LIMIT = 10
 
 function DocumentDetail() {
   const { id } = useParams()
   const navigate = useNavigate()
   const [document, setDocument] = useState(null)
+  const [content, setContent] = useState('')
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [tagName, setTagName] = useState('')
@@ -18,14 +21,15 @@ function DocumentDetail() {
   }, [id])
 
   useEffect(() => {
-    loadAvailableTags()
-  }, [id])
+    loadAvailableTags(tagName)
+  }, [id, tagName])
 
   async function loadDocument() {
     try {
       setLoading(true)
-      const data = await getDocument(id)
+      const [data, text] = await Promise.all([getDocument(id), getDocumentContent(id)])
       setDocument(data)
+      setContent(text)
     } catch (err) {
       setError(err.message || 'Failed to load document')
     } finally {
@@ -33,9 +37,13 @@ function DocumentDetail() {
     }
   }
 
-  async function loadAvailableTags() {
+  async function loadAvailableTags(prefix) {
+    if (!prefix.trim()) {
+      setAvailableTags([])
+      return
+    }
     try {
-      const data = await getTags()
+      const data = await getTags({ prefix: prefix.trim(), limit: SUGGESTION_LIMIT })
       setAvailableTags(data)
     } catch (err) {
       setAvailableTags([])
@@ -114,7 +122,7 @@ function DocumentDetail() {
       </div>
       <h3>Extracted Content</h3>
       <div className="content">
-        {document.content || 'No content extracted'}
+        {content || 'No content extracted'}
       </div>
       <div className="tag-section">
         <h3>Tags</h3>
@@ -196,7 +204,7 @@ function filteredTags(availableTags, query, currentTags) {
   return availableTags.filter(tag => {
     if (currentIds.has(tag.id)) return false
     if (!normalized) return true
-    return tag.name.toLowerCase().includes(normalized)
+    return tag.name.toLowerCase().startsWith(normalized)
   })
 }
 
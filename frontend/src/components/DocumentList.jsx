@@ -1,10 +1,14 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
-import { getDocuments, getDocumentsByTag } from '../api'
+import { getDocuments, getDocumentsByTag, getTags } from '../api'
+
+const TAG_FILTER_LIMIT = 200
 
 function DocumentList({ refreshKey }) {
   const [documents, setDocuments] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [error, setError] = useState(null)
   const [tags, setTags] = useState([])
   const [selectedTag, setSelectedTag] = useState('')
@@ -13,25 +17,23 @@ function DocumentList({ refreshKey }) {
     loadDocuments()
   }, [refreshKey, selectedTag])
 
+  useEffect(() => {
+    loadTags()
+  }, [refreshKey])
+
+
+  function fetchPage(cursor) {
+    return selectedTag
+      ? getDocumentsByTag(selectedTag, 'all', cursor)
+      : getDocuments(cursor)
+  }
 
   async function loadDocuments() {
     try {
       setLoading(true)
-      const data = selectedTag
-        ? await getDocumentsByTag(selectedTag)
-        : await getDocuments()
-      setDocuments(data)
-      if (!selectedTag) {
-        const tagMap = new Map()
-        data.forEach((doc) => {
-          (doc.tags || []).forEach((tag) => {
-            if (!tagMap.has(tag.id)) {
-              tagMap.set(tag.id, tag)
-            }
-          })
-        })
-        setTags(Array.from(tagMap.values()))
-      }
+      const page = await fetchPage()
+      setDocuments(page.items)
+      setNextCursor(page.nextCursor)
     } catch (err) {
       setError(err.message || 'Failed to load documents')
     } finally {
@@ -39,6 +41,26 @@ function DocumentList({ refreshKey }) {
     }
   }
 
+  async function loadMore() {
+    try {
+      setLoadingMore(true)
+      const page = await fetchPage(nextCursor)
+      setDocuments(current => [...current, ...page.items])
+      setNextCursor(page.nextCursor)
+    } catch (err) {
+      setError(err.message || 'Failed to load documents')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
+  async function loadTags() {
+    try {
+      setTags(await getTags({ withCounts: true, order: 'count', limit: TAG_FILTER_LIMIT }))
+    } catch (err) {
+      setTags([])
+    }
+  }
 
   if (loading) {
     return <div className="loading">Loading documents...</div>
@@ -60,7 +82,9 @@ function DocumentList({ refreshKey }) {
           >
             <option value="">All</option>
             {tags.map(tag => (
-              <option key={tag.id} value={tag.name}>{tag.name}</option>
+              <option key={tag.id} value={tag.name}>
+                {tag.name} ({tag.document_count})
+              </option>
             ))}
           </select>
         </label>
@@ -91,6 +115,11 @@ function DocumentList({ refreshKey }) {
           </div>
         ))
       )}
+      {nextCursor && (
+        <button className="load-more-btn" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? 'Loading...' : 'Load more'}
+        </button>
+      )}
     </div>
   )
 }